@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the BillPay Template Manager MCP server
+Prints JSON results so runs can be compared across commits
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import os
+import resource
+import select
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import yaml
+
+import server
+
+CLOUD_PROVIDERS = ["aws", "gcp", "azure"]
+DEPLOYMENT_TYPES = ["simulation", "real-aws-oidc", "real-gcp", "real-azure"]
+
+def generate_documents(count: int) -> List[Dict[str, Any]]:
+    """Build realistic template.yaml documents covering every template type"""
+    template_types = list(server.TEMPLATE_TYPES.keys())
+    documents = []
+    for i in range(count):
+        template_type = template_types[i % len(template_types)]
+        args = {
+            "cloud_providers": CLOUD_PROVIDERS[:1 + i % len(CLOUD_PROVIDERS)],
+            "deployment_types": DEPLOYMENT_TYPES[:2 + i % 3]
+        }
+        description = f"BillPay {template_type} template #{i} for team {i % 17} 🚀"
+        documents.append(server.generate_template_yaml(f"billpay-bench-{i:05d}", template_type, description, args))
+    return documents
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    """Fastest wall-clock time of func over several runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def bench_yaml(args: argparse.Namespace) -> Dict[str, Any]:
+    """Compare pure-Python and libyaml parse/dump throughput"""
+    documents = generate_documents(args.templates)
+    texts = [yaml.dump(document, Dumper=yaml.Dumper, default_flow_style=False, sort_keys=False, width=server.YAML_WIDTH) for document in documents]
+    total_bytes = sum(len(text.encode()) for text in texts)
+
+    backends = {"python": (yaml.SafeLoader, yaml.Dumper)}
+    if hasattr(yaml, "CSafeLoader"):
+        backends["libyaml"] = (yaml.CSafeLoader, yaml.CDumper)
+
+    results: Dict[str, Any] = {
+        "benchmark": "yaml",
+        "templates": args.templates,
+        "bytes": total_bytes,
+        "active_loader": server.yaml_backend()[1].__name__,
+        "active_dumper": server.yaml_backend()[2].__name__,
+        "backends": {}
+    }
+
+    for backend, (loader, dumper) in backends.items():
+        parse = best_of(args.repeat, lambda: [yaml.load(text, Loader=loader) for text in texts])
+        dump = best_of(args.repeat, lambda: [
+            yaml.dump(document, Dumper=dumper, default_flow_style=False, sort_keys=False, width=server.YAML_WIDTH)
+            for document in documents
+        ])
+        results["backends"][backend] = {
+            "parse_seconds": round(parse, 6),
+            "parse_docs_per_second": round(len(texts) / parse, 1),
+            "parse_mb_per_second": round(total_bytes / parse / 1e6, 3),
+            "dump_seconds": round(dump, 6),
+            "dump_docs_per_second": round(len(documents) / dump, 1)
+        }
+
+    if "libyaml" in backends:
+        python, libyaml = results["backends"]["python"], results["backends"]["libyaml"]
+        results["parse_speedup"] = round(python["parse_seconds"] / libyaml["parse_seconds"], 2)
+        results["dump_speedup"] = round(python["dump_seconds"] / libyaml["dump_seconds"], 2)
+        results["identical_output"] = all(
+            yaml.dump(document, Dumper=yaml.CDumper, default_flow_style=False, sort_keys=False, width=server.YAML_WIDTH) == text
+            for document, text in zip(documents, texts)
+        )
+
+    return results
+
+def build_catalog(base: Path, count: int, broken_ratio: float, seed: int) -> List[str]:
+    """Write a synthetic catalog using the server's own generators"""
+    rng = random.Random(seed)
+    template_types = list(server.TEMPLATE_TYPES.keys())
+    names = []
+    for i in range(count):
+        template_type = template_types[i % len(template_types)]
+        template_name = f"billpay-bench-{i:05d}"
+        args = {
+            "cloud_providers": CLOUD_PROVIDERS[:1 + i % len(CLOUD_PROVIDERS)],
+            "deployment_types": DEPLOYMENT_TYPES[:2 + i % 3]
+        }
+        template_path = base / template_name
+        (template_path / "skeleton" / ".github" / "workflows").mkdir(parents=True)
+        template_yaml = server.generate_template_yaml(template_name, template_type, f"Synthetic {template_type} template #{i}", args)
+        content = server.dump_yaml(template_yaml)
+        if rng.random() < broken_ratio:
+            # Leave work for the fix/validate tools on a share of the catalog
+            content = content.replace("branchOrTagName: trunk", "branchOrTagName: main")
+        with open(template_path / "template.yaml", "w") as f:
+            f.write(content)
+        server.generate_skeleton_files(template_path / "skeleton", template_name, template_type, args)
+        names.append(template_name)
+    return names
+
+# Templates per create_templates call
+BATCH_SIZE = 100
+
+# Argument builders per tool: (catalog names, iteration) -> tool arguments
+TOOL_ARGUMENTS: Dict[str, Callable[[List[str], int], Dict[str, Any]]] = {
+    "create_template": lambda names, i: {
+        "template_name": f"bench-created-{i:05d}",
+        "template_type": list(server.TEMPLATE_TYPES.keys())[i % len(server.TEMPLATE_TYPES)],
+        "description": "Created by benchmark"
+    },
+    "create_templates": lambda names, i: {"templates": [
+        {
+            "template_name": f"bench-batch-{i:05d}-{j:03d}",
+            "template_type": list(server.TEMPLATE_TYPES.keys())[j % len(server.TEMPLATE_TYPES)],
+            "description": "Created by benchmark",
+            "cloud_providers": CLOUD_PROVIDERS[:1 + j % len(CLOUD_PROVIDERS)]
+        }
+        for j in range(BATCH_SIZE)
+    ]},
+    "validate_template": lambda names, i: {"template_name": names[i * 7919 % len(names)]},
+    "validate_all_templates": lambda names, i: {},
+    "fix_template_branches": lambda names, i: {"template_name": names[i * 104729 % len(names)]},
+    "fix_all_template_branches": lambda names, i: {"dry_run": True},
+    "rename_template": lambda names, i: {"old_name": names[-1 - i], "new_purpose": f"bench-renamed-{i:05d}"},
+    "find_dependents": lambda names, i: {"reference": names[i * 31 % len(names)] if i % 2 else list(server.TEMPLATE_TYPES.values())[i % len(server.TEMPLATE_TYPES)]["deployment_target"]},
+    "list_templates": lambda names, i: {},
+    "search_templates": lambda names, i: {"query": f"templates dispatching {list(server.TEMPLATE_TYPES.values())[i % len(server.TEMPLATE_TYPES)]['deployment_target']} on branch main"},
+    "export_catalog": lambda names, i: {"since": "latest"} if i else {},
+    "server_stats": lambda names, i: {}
+}
+
+# Tools that touch the whole catalog get fewer iterations
+CATALOG_WIDE_TOOLS = {"create_templates", "validate_all_templates", "fix_all_template_branches", "list_templates", "export_catalog"}
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty sample list"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+async def time_tool(name: str, names: List[str], iterations: int) -> Dict[str, Any]:
+    """Latency distribution of one tool plus the allocation peak of one extra traced call"""
+    build_args = TOOL_ARGUMENTS[name]
+    timings = []
+    for i in range(iterations):
+        args = build_args(names, i)
+        start = time.perf_counter()
+        await server.call_tool(name, args)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        await server.call_tool(name, build_args(names, iterations))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "calls": iterations,
+        "cold_ms": round(timings[0], 3),
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "max_ms": round(max(timings), 3),
+        "peak_alloc_bytes": peak
+    }
+
+async def run_catalog(size: int, args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = Path(tempfile.mkdtemp(prefix="billpay-bench-"))
+    try:
+        base = workdir / "templates"
+        base.mkdir()
+        start = time.perf_counter()
+        names = build_catalog(base, size, args.broken_ratio, args.seed)
+        build_seconds = time.perf_counter() - start
+
+        # Point the server at the synthetic catalog with cold caches
+        server.TEMPLATES_BASE = str(base)
+        server.TEMPLATE_INDEX = server.TemplateIndex()
+        server.VALIDATION_CACHE = server.ValidationCache(workdir / "validation-cache.json", server.VALIDATION_CACHE_SIZE)
+        server.CATALOG_DB = server.CatalogDB(workdir / "catalog.sqlite3")
+        server.CATALOG_EXPORTER = server.CatalogExporter(workdir / "snapshots")
+
+        tools = {}
+        for tool in await server.list_tools():
+            if tool.name not in TOOL_ARGUMENTS or (args.tools and tool.name not in args.tools):
+                continue
+            iterations = args.catalog_iterations if tool.name in CATALOG_WIDE_TOOLS else args.iterations
+            tools[tool.name] = await time_tool(tool.name, names, max(1, min(iterations, size // 2)))
+
+        return {"templates": size, "build_seconds": round(build_seconds, 3), "tools": tools}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def bench_catalog(args: argparse.Namespace) -> Dict[str, Any]:
+    """Time every tool against synthetic catalogs of increasing size"""
+    if args.process_workers is not None:
+        server.PROCESS_WORKERS = args.process_workers
+    results = [asyncio.run(run_catalog(size, args)) for size in args.sizes]
+    return {
+        "benchmark": "catalog",
+        "yaml_loader": server.yaml_backend()[1].__name__,
+        "workers": server.MAX_WORKERS,
+        "process_workers": server.PROCESS_WORKERS,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results
+    }
+
+def compare(args: argparse.Namespace) -> Dict[str, Any]:
+    """Ratio of candidate to baseline latency for every (size, tool) pair"""
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    baseline_results = {result["templates"]: result["tools"] for result in baseline["results"]}
+    comparison = []
+    for result in candidate["results"]:
+        before = baseline_results.get(result["templates"], {})
+        for tool, stats in result["tools"].items():
+            if tool not in before:
+                continue
+            comparison.append({
+                "templates": result["templates"],
+                "tool": tool,
+                "p50_ratio": round(stats["p50_ms"] / before[tool]["p50_ms"], 3) if before[tool]["p50_ms"] else None,
+                "p99_ratio": round(stats["p99_ms"] / before[tool]["p99_ms"], 3) if before[tool]["p99_ms"] else None,
+                "peak_alloc_ratio": round(stats["peak_alloc_bytes"] / before[tool]["peak_alloc_bytes"], 3) if before[tool]["peak_alloc_bytes"] else None
+            })
+    return {"benchmark": "compare", "comparison": comparison}
+
+SERVER_PATH = Path(__file__).resolve().parent / "server.py"
+
+# How long a single startup run may take before it is reported as hung
+STARTUP_TIMEOUT = 30.0
+
+def read_response(process: subprocess.Popen, request_id: int, deadline: float) -> Dict[str, Any]:
+    """Read newline-delimited JSON-RPC messages until the response to request_id"""
+    buffer = b""
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise TimeoutError(f"no response to request {request_id} within {STARTUP_TIMEOUT}s")
+        readable, _, _ = select.select([process.stdout], [], [], remaining)
+        if not readable:
+            continue
+        chunk = os.read(process.stdout.fileno(), 65536)
+        if not chunk:
+            raise RuntimeError(f"server exited with {process.wait()} before answering request {request_id}")
+        buffer += chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            if line.strip():
+                message = json.loads(line)
+                if message.get("id") == request_id:
+                    return message
+
+def send(process: subprocess.Popen, message: Dict[str, Any]):
+    process.stdin.write(json.dumps(message).encode() + b"\n")
+    process.stdin.flush()
+
+def startup_run(server_path: Path) -> Dict[str, float]:
+    """Launch the server over stdio like an MCP host and time the handshake"""
+    start = time.perf_counter()
+    deadline = start + STARTUP_TIMEOUT
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen([sys.executable, str(server_path)], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            send(process, {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {"protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "billpay-benchmark", "version": "1.0"}}
+            })
+            read_response(process, 1, deadline)
+            initialized = time.perf_counter()
+            send(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+            send(process, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+            tools = read_response(process, 2, deadline)
+            listed = time.perf_counter()
+        except (RuntimeError, TimeoutError) as error:
+            stderr.seek(0)
+            raise RuntimeError(f"{error}\n{stderr.read().decode(errors='replace')}") from None
+        finally:
+            process.stdin.close()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+    return {
+        "first_response_ms": (initialized - start) * 1000,
+        "tools_list_ms": (listed - start) * 1000,
+        "tools": len(tools.get("result", {}).get("tools", []))
+    }
+
+def import_run(server_path: Path) -> float:
+    """Wall-clock time of a fresh interpreter importing the server module"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import server"], cwd=server_path.parent, check=True)
+    return (time.perf_counter() - start) * 1000
+
+def bench_startup(args: argparse.Namespace) -> Dict[str, Any]:
+    """Time-to-first-response of a freshly launched server over stdio"""
+    server_path = Path(args.server)
+    runs = [startup_run(server_path) for _ in range(args.runs)]
+    imports = [import_run(server_path) for _ in range(args.runs)]
+    
+    def distribution(samples: List[float]) -> Dict[str, float]:
+        return {
+            "min_ms": round(min(samples), 3),
+            "p50_ms": round(percentile(samples, 0.50), 3),
+            "max_ms": round(max(samples), 3)
+        }
+    
+    results: Dict[str, Any] = {
+        "benchmark": "startup",
+        "runs": args.runs,
+        "tools": runs[0]["tools"],
+        "first_response": distribution([run["first_response_ms"] for run in runs]),
+        "tools_list": distribution([run["tools_list_ms"] for run in runs]),
+        "import": distribution(imports)
+    }
+    if args.budget is not None:
+        results["budget_ms"] = args.budget
+        results["within_budget"] = results["first_response"]["p50_ms"] <= args.budget
+    return results
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(size) for size in value.split(",") if size]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    yaml_parser = subparsers.add_parser("yaml", help="YAML parse/dump throughput per backend")
+    yaml_parser.add_argument("--templates", type=int, default=500)
+    yaml_parser.add_argument("--repeat", type=int, default=5)
+    yaml_parser.set_defaults(func=bench_yaml)
+
+    catalog_parser = subparsers.add_parser("catalog", help="Per-tool latency and memory on synthetic catalogs")
+    catalog_parser.add_argument("--sizes", type=parse_sizes, default=[100, 1000], help="Comma-separated catalog sizes (100 to 50000)")
+    catalog_parser.add_argument("--iterations", type=int, default=50, help="Calls per single-template tool")
+    catalog_parser.add_argument("--catalog-iterations", type=int, default=5, help="Calls per catalog-wide tool")
+    catalog_parser.add_argument("--broken-ratio", type=float, default=0.1, help="Share of templates generated with a wrong dispatch branch")
+    catalog_parser.add_argument("--tools", nargs="*", help="Only time these tools")
+    catalog_parser.add_argument("--seed", type=int, default=42)
+    catalog_parser.add_argument("--process-workers", type=int, help="Override TEMPLATE_MANAGER_PROCESS_WORKERS (0 disables the process pool)")
+    catalog_parser.set_defaults(func=bench_catalog)
+
+    startup_parser = subparsers.add_parser("startup", help="Time-to-first-response of a new server process over stdio")
+    startup_parser.add_argument("--runs", type=int, default=10)
+    startup_parser.add_argument("--budget", type=float, help="Exit non-zero when the median time to first response exceeds this many ms")
+    startup_parser.add_argument("--server", default=str(SERVER_PATH), help="Server script to launch")
+    startup_parser.set_defaults(func=bench_startup)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two catalog benchmark JSON files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.set_defaults(func=compare)
+
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+
+    args = parser.parse_args()
+    results = args.func(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if results.get("within_budget") is False:
+        print(f"Startup budget exceeded: {results['first_response']['p50_ms']}ms > {results['budget_ms']}ms", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
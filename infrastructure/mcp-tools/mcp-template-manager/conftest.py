@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep the server's on-disk caches out of the user's home, whichever test imports it first
+os.environ.setdefault("TEMPLATE_MANAGER_CACHE_DIR", tempfile.mkdtemp(prefix="template-manager-test-"))
@@ -4,16 +4,126 @@ MCP Server for BillPay Template Management
 Standardizes creation and management of Backstage templates
 """
 
+import asyncio
+import base64
+import contextlib
+import contextvars
+import fnmatch
+import hashlib
+import heapq
+import importlib.util
 import json
 import os
-import yaml
+import re
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
-# Template base path
-TEMPLATES_BASE = "/home/giovanemere/periferia/billpay/repositories/templates_backstage"
+if TYPE_CHECKING:
+    import sqlite3
+    from concurrent.futures import ProcessPoolExecutor
+
+# yaml, sqlite3, ctypes, difflib, multiprocessing and msgpack are imported where
+# first needed: the host launches a server per session, so import time is
+# handshake latency
+
+# Optional YAML config file (templates_base, template_roots); environment variables win
+CONFIG: Dict[str, Any] = {}
+if os.environ.get("TEMPLATE_MANAGER_CONFIG"):
+    import yaml
+    with open(os.environ["TEMPLATE_MANAGER_CONFIG"]) as _config_file:
+        CONFIG = yaml.safe_load(_config_file) or {}
+
+# Template base path: highest-precedence root, and where new templates are created
+TEMPLATES_BASE = os.environ.get("TEMPLATE_MANAGER_TEMPLATES_BASE", CONFIG.get("templates_base", "/home/giovanemere/periferia/billpay/repositories/templates_backstage"))
+
+# Further template roots after TEMPLATES_BASE, in precedence order (os.pathsep-separated)
+if "TEMPLATE_MANAGER_TEMPLATE_ROOTS" in os.environ:
+    TEMPLATE_ROOTS = [root for root in os.environ["TEMPLATE_MANAGER_TEMPLATE_ROOTS"].split(os.pathsep) if root]
+else:
+    TEMPLATE_ROOTS = [str(root) for root in CONFIG.get("template_roots") or []]
+
+# Worker pool size for blocking filesystem and YAML work
+MAX_WORKERS = int(os.environ.get("TEMPLATE_MANAGER_WORKERS", min(32, (os.cpu_count() or 1) + 4)))
+
+# Worker processes for catalog-wide parsing/validation (0 keeps everything in threads)
+PROCESS_WORKERS = int(os.environ.get("TEMPLATE_MANAGER_PROCESS_WORKERS", 0))
+
+# Fewer templates than this to parse or check stay in threads (IPC would dominate)
+PROCESS_MIN_BATCH = int(os.environ.get("TEMPLATE_MANAGER_PROCESS_MIN_BATCH", 256))
+
+# On-disk cache location and bounded size for validation results
+CACHE_DIR = os.environ.get("TEMPLATE_MANAGER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "billpay-template-manager"))
+VALIDATION_CACHE_SIZE = int(os.environ.get("TEMPLATE_MANAGER_VALIDATION_CACHE_SIZE", 10000))
+
+# Seconds between validation cache writes after single validations; bulk
+# validations and shutdown always write
+VALIDATION_CACHE_SAVE_INTERVAL = float(os.environ.get("TEMPLATE_MANAGER_VALIDATION_CACHE_SAVE_INTERVAL", 30.0))
+
+# Bump when the checks in check_template change so cached results are dropped
+VALIDATION_RULES_VERSION = 3
+
+# SQLite catalog backing search_templates (and warm starts of the index)
+CATALOG_DB_PATH = os.environ.get("TEMPLATE_MANAGER_CATALOG_DB", os.path.join(CACHE_DIR, "catalog.sqlite3"))
+
+# Seconds search_templates may reuse the last directory scan when no watcher runs
+SEARCH_MAX_STALENESS = float(os.environ.get("TEMPLATE_MANAGER_SEARCH_MAX_STALENESS", 5.0))
+
+# Directories besides the templates base (os.pathsep-separated) scanned for references
+REFERENCE_ROOTS = [root for root in os.environ.get("TEMPLATE_MANAGER_REFERENCE_ROOTS", "").split(os.pathsep) if root]
+
+# Seconds find_dependents/rename_template may reuse the last reference scan
+REFERENCE_MAX_STALENESS = float(os.environ.get("TEMPLATE_MANAGER_REFERENCE_MAX_STALENESS", 5.0))
+
+# auto: after the first scan, inotify on every indexed directory feeds the
+# reference index, so lookups re-read only what changed; off: rescan the roots
+# (at most every REFERENCE_MAX_STALENESS seconds)
+REFERENCE_WATCH = os.environ.get("TEMPLATE_MANAGER_REFERENCE_WATCH", "auto").lower()
+
+# Default cap on files rename_template rewrites when updating references
+REFERENCE_MAX_UPDATES = 200
+
+# Where export_catalog keeps snapshots (needed to compute deltas) and how many it keeps
+SNAPSHOT_DIR = os.environ.get("TEMPLATE_MANAGER_SNAPSHOT_DIR", os.path.join(CACHE_DIR, "snapshots"))
+SNAPSHOT_KEEP = int(os.environ.get("TEMPLATE_MANAGER_SNAPSHOT_KEEP", 20))
+
+# Bumped whenever the snapshot record layout changes
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Opt-in per-call profiling: cProfile + tracemalloc for 1 in PROFILE_SAMPLE calls
+# of each tool (0 disables sampling; the profile argument still works)
+PROFILE_SAMPLE = int(os.environ.get("TEMPLATE_MANAGER_PROFILE_SAMPLE", 0))
+PROFILE_TOOLS = {tool for tool in os.environ.get("TEMPLATE_MANAGER_PROFILE_TOOLS", "").split(",") if tool}
+PROFILE_DIR = os.environ.get("TEMPLATE_MANAGER_PROFILE_DIR", os.path.join(CACHE_DIR, "profiles"))
+PROFILE_KEEP = int(os.environ.get("TEMPLATE_MANAGER_PROFILE_KEEP", 100))
+# Frames kept per allocation traceback
+PROFILE_TRACE_FRAMES = 10
+# Entries in the JSON summary written next to each dump
+PROFILE_TOP = 25
+# Before 3.12 a cProfile.Profile sees only the thread that enabled it; from 3.12
+# it sits on sys.monitoring, which allows one profiler per process and sees every thread
+PROFILE_PER_THREAD = sys.version_info < (3, 12)
+
+# libyaml and PyYAML fold long quoted scalars differently; never folding keeps
+# the output byte-identical whichever backend is active
+YAML_WIDTH = 2 ** 31 - 1
+
+# Optional background watch of every template root: off, auto, inotify or poll
+WATCH_MODE = os.environ.get("TEMPLATE_MANAGER_WATCH", "off").lower()
+WATCH_POLL_INTERVAL = float(os.environ.get("TEMPLATE_MANAGER_WATCH_INTERVAL", 2.0))
+WATCH_DEBOUNCE = float(os.environ.get("TEMPLATE_MANAGER_WATCH_DEBOUNCE", 0.25))
+
+# list_templates page sizes
+DEFAULT_LIST_LIMIT = 100
+MAX_LIST_LIMIT = 1000
 
 # Template standards and configurations
 TEMPLATE_STANDARDS = {
@@ -55,11 +165,1845 @@ TEMPLATE_TYPES = {
     }
 }
 
+# Upper bounds (ms) of the per-tool latency histogram buckets
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf")]
+
+# Tool currently being dispatched, so I/O helpers can attribute their cost
+CURRENT_TOOL: contextvars.ContextVar[str] = contextvars.ContextVar("current_tool", default="(background)")
+
+class ServerStats:
+    """Per-tool call counts, latency histograms and I/O/YAML phase costs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._tools: Dict[str, Dict[str, Any]] = {}
+
+    def _tool(self, name: str) -> Dict[str, Any]:
+        tool = self._tools.get(name)
+        if tool is None:
+            tool = self._tools[name] = {
+                "calls": 0,
+                "errors": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "histogram": [0] * len(LATENCY_BUCKETS_MS),
+                "phases": {}
+            }
+        return tool
+
+    def record_call(self, name: str, seconds: float, failed: bool):
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            tool = self._tool(name)
+            tool["calls"] += 1
+            tool["errors"] += failed
+            tool["total_ms"] += elapsed_ms
+            tool["max_ms"] = max(tool["max_ms"], elapsed_ms)
+            tool["histogram"][next(i for i, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound)] += 1
+
+    def record_phase(self, phase: str, seconds: float, nbytes: int = 0):
+        """Account a directory scan, file read/write or YAML parse/dump to the current tool"""
+        with self._lock:
+            phases = self._tool(CURRENT_TOOL.get())["phases"]
+            stats = phases.get(phase)
+            if stats is None:
+                stats = phases[phase] = {"count": 0, "ms": 0.0, "bytes": 0}
+            stats["count"] += 1
+            stats["ms"] += seconds * 1000
+            stats["bytes"] += nbytes
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            tools = {}
+            for name, tool in sorted(self._tools.items()):
+                tools[name] = {
+                    "calls": tool["calls"],
+                    "errors": tool["errors"],
+                    "mean_ms": round(tool["total_ms"] / tool["calls"], 3) if tool["calls"] else 0.0,
+                    "max_ms": round(tool["max_ms"], 3),
+                    "histogram_ms": {
+                        ("inf" if bound == float("inf") else str(bound)): count
+                        for bound, count in zip(LATENCY_BUCKETS_MS, tool["histogram"]) if count
+                    },
+                    "phases": {
+                        phase: {"count": stats["count"], "ms": round(stats["ms"], 3), "bytes": stats["bytes"]}
+                        for phase, stats in sorted(tool["phases"].items())
+                    }
+                }
+            return {"uptime_seconds": round(time.time() - self.started, 3), "tools": tools}
+
+SERVER_STATS = ServerStats()
+
+# Summary fields returned by list_templates in JSON format
+LIST_FIELDS = ("name", "title", "description", "path", "steps", "tags", "type")
+
+# list_templates sort orders: key function over index summaries and direction
+LIST_SORT_KEYS = {
+    "name": (lambda template: (str(template["name"]), template["path"]), False),
+    "-name": (lambda template: (str(template["name"]), template["path"]), True),
+    "steps": (lambda template: (template["steps"], str(template["name"]), template["path"]), False),
+    "-steps": (lambda template: (template["steps"], str(template["name"]), template["path"]), True)
+}
+
+# Scheduling priority per tool (lower runs first): interactive reads, single-template
+# writes, then catalog-wide jobs; unlisted tools get 1
+TOOL_PRIORITIES = {
+    "list_templates": 0,
+    "search_templates": 0,
+    "find_dependents": 0,
+    "validate_template": 0,
+    "server_stats": 0,
+    "create_template": 1,
+    "fix_template_branches": 1,
+    "rename_template": 1,
+    "create_templates": 2,
+    "export_catalog": 2,
+    "validate_all_templates": 2,
+    "fix_all_template_branches": 2
+}
+
+# Tools whose identical concurrent calls can share one result
+COALESCED_TOOLS = {"list_templates", "search_templates", "find_dependents", "validate_template", "validate_all_templates"}
+
+class PriorityScheduler:
+    """Bounded number of concurrent blocking jobs, handing free slots to the most urgent waiter"""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = 0
+
+    async def acquire(self, priority: int):
+        if self._active < self.slots and not self._waiters:
+            self._active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._waiters, (priority, self._sequence, future))
+        start = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled: pass it on
+                self.release()
+            raise
+        SERVER_STATS.record_phase("queue_wait", time.perf_counter() - start)
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"slots": self.slots, "active": self._active, "waiting": len(self._waiters)}
+
+SCHEDULER = PriorityScheduler(MAX_WORKERS)
+
+class TemplateLocks:
+    """Per-template write locks, so concurrent writers to one template serialize"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks: Dict[str, List[Any]] = {}
+
+    @contextlib.contextmanager
+    def hold(self, *template_paths: Path):
+        """Hold the write locks of every given template (acquired in a stable order)"""
+        keys = sorted({str(template_path) for template_path in template_paths})
+        with self._lock:
+            locks = []
+            for key in keys:
+                entry = self._locks.setdefault(key, [threading.Lock(), 0])
+                entry[1] += 1
+                locks.append(entry[0])
+        try:
+            with contextlib.ExitStack() as stack:
+                for lock in locks:
+                    stack.enter_context(lock)
+                yield
+        finally:
+            with self._lock:
+                for key in keys:
+                    entry = self._locks[key]
+                    entry[1] -= 1
+                    if not entry[1]:
+                        del self._locks[key]
+
+TEMPLATE_LOCKS = TemplateLocks()
+
+class CallProfile:
+    """cProfile and tracemalloc capture of one tool call, worker-thread jobs included
+    
+    Before 3.12 the event loop gets a profiler and every run_blocking job of the
+    call gets its own, merged when the call finishes; from 3.12 the loop profiler
+    alone sees all threads. Work of other calls running concurrently, and their
+    allocations, are captured too. A profiler that cannot be enabled (another
+    profiling tool is active) is dropped rather than failing the call.
+    """
+
+    def __init__(self, name: str, arguments: Dict[str, Any]):
+        import cProfile
+        import tracemalloc
+        self.name = name
+        self.arguments = arguments
+        self._lock = threading.Lock()
+        self._jobs: List[Any] = []
+        self._job_count = 0
+        self._owns_tracing = not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start(PROFILE_TRACE_FRAMES)
+        tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        self._loop_profile = self._enable(cProfile.Profile())
+
+    @staticmethod
+    def _enable(profile: Any) -> Optional[Any]:
+        """Enable a profiler, or None when the process already has an active one"""
+        try:
+            profile.enable()
+        except ValueError:
+            return None
+        return profile
+
+    def run_job(self, func, *args):
+        """Run a worker-thread job, under its own profiler where threads need one"""
+        import cProfile
+        with self._lock:
+            self._job_count += 1
+        profile = self._enable(cProfile.Profile()) if PROFILE_PER_THREAD else None
+        if profile is None:
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+            with self._lock:
+                self._jobs.append(profile)
+
+    def finish(self) -> Tuple[Any, Any, Dict[str, Any]]:
+        """Stop capturing; returns (pstats.Stats, tracemalloc.Snapshot, summary)"""
+        import pstats
+        import tracemalloc
+        if self._loop_profile is not None:
+            self._loop_profile.disable()
+        elapsed = time.perf_counter() - self.start
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if self._owns_tracing:
+            tracemalloc.stop()
+        
+        with self._lock:
+            profiles = [profile for profile in [self._loop_profile] + self._jobs if profile is not None]
+            jobs = self._job_count
+        stats = pstats.Stats(*profiles) if profiles else None
+        
+        functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP] if stats else []
+        allocations = snapshot.statistics("lineno")[:PROFILE_TOP]
+        summary = {
+            "tool": self.name,
+            "arguments": self.arguments,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "worker_jobs": jobs,
+            "cprofile": stats is not None,
+            "peak_traced_bytes": peak,
+            "top_functions": [
+                {"function": f"{filename}:{line}({function})", "calls": calls, "total_ms": round(total * 1000, 3), "cumulative_ms": round(cumulative * 1000, 3)}
+                for (filename, line, function), (_, calls, total, cumulative, _) in functions
+            ],
+            "top_allocations": [
+                {"location": str(statistic.traceback[0]), "bytes": statistic.size, "count": statistic.count}
+                for statistic in allocations
+            ]
+        }
+        return stats, snapshot, summary
+
+class ToolProfiler:
+    """Decides which calls get profiled and writes their dumps to PROFILE_DIR"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, int] = {}
+        self._active = False
+        self._sequence = 0
+        self.written = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def begin(self, name: str, arguments: Dict[str, Any]) -> Optional[CallProfile]:
+        """Start a CallProfile when this call is sampled or asks for one, else None
+        
+        One call is profiled at a time: tracemalloc and the loop profiler are
+        process-wide, so a sample that lands while another is running is skipped.
+        """
+        with self._lock:
+            count = self._calls[name] = self._calls.get(name, 0) + 1
+            sampled = PROFILE_SAMPLE > 0 and (not PROFILE_TOOLS or name in PROFILE_TOOLS) and count % PROFILE_SAMPLE == 0
+            if not (sampled or arguments.get('profile')):
+                return None
+            if self._active:
+                self.skipped += 1
+                return None
+            self._active = True
+        try:
+            return CallProfile(name, arguments)
+        except Exception:
+            # Profiling must never fail the call it observes
+            with self._lock:
+                self._active = False
+                self.failed += 1
+            return None
+
+    def record_failure(self):
+        with self._lock:
+            self.failed += 1
+
+    def end(self, call_profile: CallProfile) -> Tuple[Any, Any, Dict[str, Any]]:
+        try:
+            return call_profile.finish()
+        finally:
+            with self._lock:
+                self._active = False
+
+    def write(self, name: str, stats: Any, snapshot: Any, summary: Dict[str, Any]) -> Path:
+        """Write <id>.prof (pstats), <id>.tracemalloc (Snapshot.dump) and <id>.json (summary)"""
+        directory = Path(PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._sequence += 1
+            profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._sequence:06d}-{name}"
+        if stats is not None:
+            stats.dump_stats(str(directory / f"{profile_id}.prof"))
+        snapshot.dump(str(directory / f"{profile_id}.tracemalloc"))
+        (directory / f"{profile_id}.json").write_text(json.dumps(summary, indent=2, default=str) + "\n")
+        with self._lock:
+            self.written += 1
+        self._prune(directory)
+        return directory / f"{profile_id}.json"
+
+    @staticmethod
+    def _prune(directory: Path):
+        summaries = sorted(directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for summary in summaries[:max(0, len(summaries) - PROFILE_KEEP)]:
+            for suffix in (".json", ".prof", ".tracemalloc"):
+                with contextlib.suppress(FileNotFoundError):
+                    summary.with_suffix(suffix).unlink()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sample": PROFILE_SAMPLE,
+                "tools": sorted(PROFILE_TOOLS),
+                "directory": PROFILE_DIR,
+                "active": self._active,
+                "written": self.written,
+                "skipped": self.skipped,
+                "failed": self.failed
+            }
+
+TOOL_PROFILER = ToolProfiler()
+
+# Profile of the call being dispatched, so run_blocking profiles its worker jobs
+CURRENT_PROFILE: contextvars.ContextVar[Optional[CallProfile]] = contextvars.ContextVar("current_profile", default=None)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared worker pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="template-io")
+        return _executor
+
+_process_pool: Optional["ProcessPoolExecutor"] = None
+
+def get_process_pool() -> Optional["ProcessPoolExecutor"]:
+    """Return the shared process pool, or None when PROCESS_WORKERS is 0"""
+    global _process_pool
+    if PROCESS_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _process_pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # spawn: the server runs threads, which fork would copy mid-flight
+            _process_pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+def process_batch(count: int) -> bool:
+    """Whether count items are worth shipping to the process pool"""
+    return PROCESS_WORKERS > 0 and count >= PROCESS_MIN_BATCH
+
+def map_shards(func, items: List[Any]) -> Optional[List[Any]]:
+    """Split items into contiguous shards, run func on each in the process pool
+    
+    Returns the concatenated results, or None when the pool is disabled or the
+    batch is too small to be worth shipping to other processes.
+    """
+    if not process_batch(len(items)):
+        return None
+    pool = get_process_pool()
+    shard_size = -(-len(items) // (PROCESS_WORKERS * 4))
+    start = time.perf_counter()
+    results = []
+    for shard in pool.map(func, [items[i:i + shard_size] for i in range(0, len(items), shard_size)]):
+        results.extend(shard)
+    SERVER_STATS.record_phase("process_pool", time.perf_counter() - start)
+    return results
+
+async def run_blocking(func, *args):
+    """Run blocking filesystem/YAML work on the worker pool instead of the event loop
+    
+    Jobs wait for a SCHEDULER slot first, so the executor never holds a backlog
+    and a read is not queued behind thousands of jobs from a bulk tool.
+    """
+    loop = asyncio.get_running_loop()
+    await SCHEDULER.acquire(TOOL_PRIORITIES.get(CURRENT_TOOL.get(), 1))
+    try:
+        context = contextvars.copy_context()
+        call_profile = CURRENT_PROFILE.get()
+        if call_profile is not None:
+            return await loop.run_in_executor(get_executor(), partial(context.run, call_profile.run_job, func, *args))
+        return await loop.run_in_executor(get_executor(), partial(context.run, func, *args))
+    finally:
+        SCHEDULER.release()
+
+def read_text(path: Path) -> str:
+    """Read a text file, accounting bytes and time to the current tool
+    
+    Line endings are kept as they are on disk (CRLF stays CRLF), so content
+    patched and written back with write_text only differs where it was edited.
+    """
+    start = time.perf_counter()
+    with open(path, newline="") as f:
+        content = f.read()
+        size = os.fstat(f.fileno()).st_size
+    SERVER_STATS.record_phase("read", time.perf_counter() - start, size)
+    return content
+
+def write_text(path: Path, content: str):
+    """Write a text file, accounting bytes and time to the current tool"""
+    start = time.perf_counter()
+    data = content.encode()
+    with open(path, "wb") as f:
+        f.write(data)
+    SERVER_STATS.record_phase("write", time.perf_counter() - start, len(data))
+    REFERENCE_INDEX.update_file(path, content)
+
+class TemplateIndex:
+    """In-process cache of template metadata keyed on (path, mtime, size)"""
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = set()
+        self._refreshed: Dict[Path, float] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, base: Path) -> List[Dict[str, Any]]:
+        """Sync the index with disk, parsing only templates that changed"""
+        seen = set()
+        changed = []
+        start = time.perf_counter()
+        with os.scandir(base) as it:
+            for entry in it:
+                if not entry.name.startswith('billpay-') or not entry.is_dir():
+                    continue
+                template_yaml_path = Path(entry.path) / "template.yaml"
+                try:
+                    stat = template_yaml_path.stat()
+                except FileNotFoundError:
+                    continue
+                key = str(template_yaml_path)
+                seen.add(key)
+                with self._lock:
+                    cached = self._entries.get(key)
+                if cached is None or cached["mtime"] != stat.st_mtime_ns or cached["size"] != stat.st_size:
+                    changed.append((template_yaml_path, stat))
+        SERVER_STATS.record_phase("scan", time.perf_counter() - start)
+        
+        parsed = map_shards(parse_shard, [(str(path), stat.st_mtime_ns, stat.st_size) for path, stat in changed])
+        if parsed is not None:
+            self.store_summaries(parsed)
+        else:
+            for template_yaml_path, stat in changed:
+                self._store(template_yaml_path, stat, load_template_data(template_yaml_path))
+        
+        with self._lock:
+            self._refreshed[base] = time.monotonic()
+            for stale in set(self._entries) - seen:
+                if self._entries[stale]["base"] == str(base):
+                    del self._entries[stale]
+                    self._dirty.add(stale)
+            return [self._entries[key]["summary"] for key in seen if key in self._entries]
+
+    def sync_template(self, template_path: Path):
+        """Re-check a single template directory, parsing only if it changed"""
+        template_yaml_path = template_path / "template.yaml"
+        try:
+            stat = template_yaml_path.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            self.discard(template_path)
+            return
+        with self._lock:
+            cached = self._entries.get(str(template_yaml_path))
+        if cached is None or cached["mtime"] != stat.st_mtime_ns or cached["size"] != stat.st_size:
+            self._store(template_yaml_path, stat, load_template_data(template_yaml_path))
+
+    def refreshed_within(self, base: Path, max_age: float) -> bool:
+        """Whether base was fully rescanned in the last max_age seconds"""
+        with self._lock:
+            refreshed = self._refreshed.get(base)
+        return refreshed is not None and time.monotonic() - refreshed <= max_age
+
+    def versions(self, base: Path) -> Dict[str, Tuple[int, int, Dict[str, Any]]]:
+        """(mtime_ns, size, summary) of every indexed template.yaml under base"""
+        base = str(base)
+        with self._lock:
+            return {key: (entry["mtime"], entry["size"], entry["summary"]) for key, entry in self._entries.items() if entry["base"] == base}
+
+    def summaries(self, base: Path) -> List[Dict[str, Any]]:
+        """Indexed templates under base, straight from memory"""
+        base = str(base)
+        with self._lock:
+            return [entry["summary"] for entry in self._entries.values() if entry["base"] == base]
+
+    def update(self, template_yaml_path: Path, template_data: Dict[str, Any]):
+        """Record an already-parsed template.yaml, e.g. right after writing it"""
+        try:
+            stat = template_yaml_path.stat()
+        except FileNotFoundError:
+            self.discard(template_yaml_path.parent)
+            return
+        self._store(template_yaml_path, stat, template_data)
+
+    def discard(self, template_path: Path):
+        """Forget a template directory that was moved or removed"""
+        key = str(template_path / "template.yaml")
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._dirty.add(key)
+
+    def preload(self, entries: Dict[str, Dict[str, Any]]):
+        """Seed the index with persisted entries; anything already indexed wins"""
+        with self._lock:
+            for key, entry in entries.items():
+                self._entries.setdefault(key, entry)
+
+    def drain_changes(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Entries changed or removed since the last drain (None means removed)"""
+        with self._lock:
+            changes = {key: self._entries.get(key) for key in self._dirty}
+            self._dirty.clear()
+        return changes
+
+    def store_summaries(self, entries: List[Tuple[str, int, int, Optional[Dict[str, Any]]]]):
+        """Record (template.yaml path, mtime_ns, size, summary) entries built elsewhere; None drops one"""
+        for key, mtime, size, summary in entries:
+            self._put(key, mtime, size, summary)
+
+    def _store(self, template_yaml_path: Path, stat: os.stat_result, template_data: Optional[Dict[str, Any]]):
+        if template_data is None:
+            self.discard(template_yaml_path.parent)
+            return
+        self._put(str(template_yaml_path), stat.st_mtime_ns, stat.st_size, summarize_template(template_yaml_path.parent, template_data))
+
+    def _put(self, key: str, mtime: int, size: int, summary: Optional[Dict[str, Any]]):
+        if summary is None:
+            # Removed between the scan and the parse
+            self.discard(Path(key).parent)
+            return
+        entry = {"base": os.path.dirname(os.path.dirname(key)), "mtime": mtime, "size": size, "summary": summary}
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty.add(key)
+
+TEMPLATE_INDEX = TemplateIndex()
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+BASE_WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+TEMPLATE_WATCH_MASK = IN_CLOSE_WRITE | IN_MODIFY | IN_ATTRIB | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+class Inotify:
+    """Minimal ctypes binding to Linux inotify; raises OSError where it is unavailable"""
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify not supported")
+        self._get_errno = ctypes.get_errno
+        self.fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(self._get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: Path, mask: int) -> Optional[int]:
+        """Watch descriptor for path, or None when it no longer exists"""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = self._get_errno()
+            if errno == 2:  # ENOENT
+                return None
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+        return wd
+
+    def read(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """(wd, mask, name) of the queued events, waiting up to timeout for some"""
+        import select
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        buffer = os.read(self.fd, 65536)
+        events = []
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(buffer):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(buffer, offset)
+            name = os.fsdecode(buffer[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b"\0"))
+            offset += INOTIFY_EVENT.size + length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class CatalogWatcher:
+    """Keeps TEMPLATE_INDEX current in the background so reads skip the disk scan
+    
+    Uses inotify when the platform provides it and falls back to periodic
+    polling otherwise (or when the kernel runs out of watches). Bursts of
+    events, e.g. a git checkout, are coalesced and applied once they settle.
+    """
+
+    def __init__(self, base: Path, index: TemplateIndex, mode: str = "auto"):
+        self.base = base
+        self.index = index
+        self.mode = mode
+        self.ready = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[Inotify] = None
+        self._watches: Dict[int, Path] = {}
+
+    def start(self):
+        if self.mode in ("auto", "inotify"):
+            try:
+                self._start_inotify()
+            except OSError:
+                if self.mode == "inotify":
+                    raise
+                self._close_inotify()
+        self.mode = "inotify" if self._inotify is not None else "poll"
+        self._thread = threading.Thread(target=self._run, name="template-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._close_inotify()
+
+    def _run(self):
+        if self.mode == "poll":
+            self.index.refresh(self.base)
+            self.ready = True
+            while not self._stop.wait(WATCH_POLL_INTERVAL):
+                self.index.refresh(self.base)
+        else:
+            self.index.refresh(self.base)
+            self.ready = True
+            self._inotify_loop()
+
+    def _start_inotify(self):
+        self._inotify = Inotify()
+        self._add_watch(self.base, BASE_WATCH_MASK)
+        with os.scandir(self.base) as it:
+            for entry in it:
+                if entry.name.startswith('billpay-') and entry.is_dir():
+                    self._add_watch(Path(entry.path), TEMPLATE_WATCH_MASK)
+
+    def _add_watch(self, path: Path, mask: int):
+        wd = self._inotify.add_watch(path, mask)
+        if wd is None:
+            if path == self.base:
+                raise OSError(2, f"inotify_add_watch failed for {path}")
+            return  # directory already gone
+        self._watches[wd] = path
+
+    def _close_inotify(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._watches.clear()
+
+    def _inotify_loop(self):
+        pending = set()
+        first_event = last_event = 0.0
+        while not self._stop.is_set():
+            timeout = WATCH_DEBOUNCE if pending else 1.0
+            try:
+                events = self._inotify.read(timeout)
+                now = time.monotonic()
+                if events:
+                    if not pending:
+                        first_event = now
+                    last_event = now
+                    self._read_events(events, pending)
+            except OSError:
+                # Out of watches or similar: degrade to polling
+                self._close_inotify()
+                self.mode = "poll"
+                while not self._stop.wait(WATCH_POLL_INTERVAL):
+                    self.index.refresh(self.base)
+                return
+            settled = now - last_event >= WATCH_DEBOUNCE or now - first_event >= 10 * WATCH_DEBOUNCE
+            if pending and settled:
+                self._apply(pending)
+                pending = set()
+
+    def _read_events(self, events: List[Tuple[int, int, str]], pending: set):
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                pending.add(None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+            
+            if directory == self.base:
+                if not name.startswith('billpay-'):
+                    continue
+                template_path = self.base / name
+                if mask & (IN_CREATE | IN_MOVED_TO) and mask & IN_ISDIR:
+                    self._add_watch(template_path, TEMPLATE_WATCH_MASK)
+                pending.add(template_path)
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF) or name == "template.yaml":
+                pending.add(directory)
+
+    def _apply(self, pending: set):
+        if None in pending:
+            # Kernel queue overflowed: resync everything
+            self.index.refresh(self.base)
+            return
+        for template_path in pending:
+            self.index.sync_template(template_path)
+
+# One watcher per template root, keyed like template_roots()
+CATALOG_WATCHERS: Dict[Path, CatalogWatcher] = {}
+
+def start_catalog_watchers() -> List[CatalogWatcher]:
+    """Start a background watcher on each existing template root if TEMPLATE_MANAGER_WATCH enables it"""
+    if WATCH_MODE in ("", "0", "off", "false", "no"):
+        return []
+    mode = "auto" if WATCH_MODE in ("1", "on", "true", "yes") else WATCH_MODE
+    for root in template_roots():
+        if root in CATALOG_WATCHERS or not root.is_dir():
+            continue
+        CATALOG_DB.warm(TEMPLATE_INDEX, root)
+        watcher = CatalogWatcher(root, TEMPLATE_INDEX, mode)
+        watcher.start()
+        CATALOG_WATCHERS[root] = watcher
+    return list(CATALOG_WATCHERS.values())
+
+class ValidationCache:
+    """Persistent LRU of validation results keyed by template content hash"""
+
+    def __init__(self, path: Path, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: Optional[OrderedDict] = None
+        self._dirty = False
+        self._saved_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entries = self._load()
+            result = entries.get(key)
+            if result is not None:
+                entries.move_to_end(key)
+            return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        with self._lock:
+            entries = self._load()
+            entries[key] = result
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self._dirty = True
+
+    def save(self, min_interval: float = 0.0):
+        """Write the cache to disk if it changed, at most once per min_interval seconds
+        
+        Persisting is best-effort: an unwritable cache directory leaves the
+        results in memory and never fails the validation that produced them.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.monotonic()
+            if min_interval > 0 and self._saved_at is not None and now - self._saved_at < min_interval:
+                return
+            self._saved_at = now
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, "w") as f:
+                    json.dump(list(self._entries.items()), f, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except OSError:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
+                return
+            self._dirty = False
+
+    def _load(self) -> OrderedDict:
+        if self._entries is None:
+            self._entries = OrderedDict()
+            try:
+                with open(self.path) as f:
+                    self._entries.update(json.load(f)[-self.max_entries:])
+            except (OSError, ValueError, TypeError):
+                pass
+        return self._entries
+
+VALIDATION_CACHE = ValidationCache(Path(CACHE_DIR) / "validation-cache.json", VALIDATION_CACHE_SIZE)
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS templates (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    base TEXT NOT NULL,
+    name TEXT,
+    title TEXT,
+    description TEXT,
+    type TEXT,
+    steps INTEGER,
+    mtime_ns INTEGER,
+    size INTEGER,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS templates_base ON templates (base, name);
+CREATE TABLE IF NOT EXISTS template_tags (template_id INTEGER NOT NULL, tag TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS template_tags_tag ON template_tags (tag);
+CREATE INDEX IF NOT EXISTS template_tags_template ON template_tags (template_id);
+CREATE TABLE IF NOT EXISTS template_parameters (template_id INTEGER NOT NULL, name TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS template_parameters_template ON template_parameters (template_id);
+CREATE TABLE IF NOT EXISTS template_steps (
+    template_id INTEGER NOT NULL,
+    step_id TEXT,
+    action TEXT,
+    workflow_id TEXT,
+    branch TEXT,
+    repo_url TEXT
+);
+CREATE INDEX IF NOT EXISTS template_steps_workflow ON template_steps (workflow_id, branch);
+CREATE INDEX IF NOT EXISTS template_steps_branch ON template_steps (branch);
+CREATE INDEX IF NOT EXISTS template_steps_action ON template_steps (action);
+CREATE INDEX IF NOT EXISTS template_steps_template ON template_steps (template_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS templates_fts USING fts5(
+    name, title, description, tags, parameters, actions, targets,
+    tokenize = 'porter unicode61'
+);
+"""
+
+# Words dropped from free-text search_templates queries before FTS matching
+SEARCH_STOPWORDS = {"a", "an", "and", "the", "of", "on", "in", "to", "for", "with", "that", "which", "using", "template", "templates"}
+
+class CatalogDB:
+    """SQLite copy of the template index with full-text search over it
+    
+    Rows mirror TemplateIndex entries (path, mtime, size, summary) and are
+    written incrementally from the index's change set, so they also let a
+    restarted server warm its index without re-parsing unchanged templates.
+    Persistence is best-effort: if the database cannot be opened or written
+    (read-only CACHE_DIR, SQLite without FTS5) it is disabled, listing keeps
+    working from memory and only search reports the error.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.error: Optional[str] = None
+        self._conn: Optional["sqlite3.Connection"] = None
+        self._warmed = set()
+        self._lock = threading.Lock()
+
+    def _connect(self) -> "sqlite3.Connection":
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            import sqlite3
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(CATALOG_SCHEMA)
+        return self._conn
+
+    def warm(self, index: TemplateIndex, base: Path):
+        """Preload the index with the persisted entries for base, once per process"""
+        import sqlite3
+        with self._lock:
+            if base in self._warmed or self.error is not None:
+                return
+            self._warmed.add(base)
+            try:
+                rows = self._connect().execute(
+                    "SELECT path, mtime_ns, size, summary FROM templates WHERE base = ?", (str(base),)
+                ).fetchall()
+            except (sqlite3.Error, OSError) as error:
+                self._disable(error)
+                return
+        index.preload({
+            str(Path(path) / "template.yaml"): {"base": str(base), "mtime": mtime_ns, "size": size, "summary": json.loads(summary)}
+            for path, mtime_ns, size, summary in rows
+        })
+
+    def sync(self, index: TemplateIndex):
+        """Persist everything the index changed since the last sync in one transaction"""
+        import sqlite3
+        changes = index.drain_changes()
+        if not changes:
+            return
+        start = time.perf_counter()
+        with self._lock:
+            if self.error is not None:
+                return
+            try:
+                conn = self._connect()
+                with conn:
+                    for key, entry in changes.items():
+                        template_path = str(Path(key).parent)
+                        row = conn.execute("SELECT id FROM templates WHERE path = ?", (template_path,)).fetchone()
+                        if row is not None:
+                            self._delete_details(conn, row[0])
+                        if entry is None:
+                            if row is not None:
+                                conn.execute("DELETE FROM templates WHERE id = ?", (row[0],))
+                            continue
+                        self._upsert(conn, row[0] if row else None, template_path, entry)
+            except (sqlite3.Error, OSError) as error:
+                self._disable(error)
+                return
+        SERVER_STATS.record_phase("catalog_db_write", time.perf_counter() - start)
+
+    def _disable(self, error: Exception):
+        """Stop persisting after the database failed; callers hold _lock"""
+        self.error = f"{type(error).__name__}: {error}"
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _delete_details(conn: "sqlite3.Connection", template_id: int):
+        conn.execute("DELETE FROM templates_fts WHERE rowid = ?", (template_id,))
+        conn.execute("DELETE FROM template_tags WHERE template_id = ?", (template_id,))
+        conn.execute("DELETE FROM template_parameters WHERE template_id = ?", (template_id,))
+        conn.execute("DELETE FROM template_steps WHERE template_id = ?", (template_id,))
+
+    @staticmethod
+    def _upsert(conn: "sqlite3.Connection", template_id: Optional[int], template_path: str, entry: Dict[str, Any]):
+        summary = entry["summary"]
+        values = (
+            str(Path(template_path).parent), str(summary["name"]), str(summary["title"]), str(summary["description"]),
+            summary["type"], summary["steps"], entry["mtime"], entry["size"], json.dumps(summary, separators=(",", ":"))
+        )
+        if template_id is None:
+            template_id = conn.execute(
+                "INSERT INTO templates (base, name, title, description, type, steps, mtime_ns, size, summary, path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", values + (template_path,)
+            ).lastrowid
+        else:
+            conn.execute(
+                "UPDATE templates SET base = ?, name = ?, title = ?, description = ?, type = ?, steps = ?, "
+                "mtime_ns = ?, size = ?, summary = ? WHERE id = ?", values + (template_id,)
+            )
+        
+        conn.executemany("INSERT INTO template_tags VALUES (?, ?)", [(template_id, tag) for tag in summary["tags"]])
+        conn.executemany("INSERT INTO template_parameters VALUES (?, ?)", [(template_id, name) for name in summary["parameters"]])
+        conn.executemany("INSERT INTO template_steps VALUES (?, ?, ?, ?, ?, ?)", [
+            (template_id, step["id"], step["action"], step["workflow"], step["branch"], step["repo"])
+            for step in summary["step_details"]
+        ])
+        targets = [
+            f"{step['workflow'] or ''} {step['branch'] or ''} {step['repo'] or ''}"
+            for step in summary["step_details"] if step["workflow"] or step["branch"]
+        ]
+        conn.execute(
+            "INSERT INTO templates_fts (rowid, name, title, description, tags, parameters, actions, targets) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (template_id, str(summary["name"]), str(summary["title"]), str(summary["description"]),
+             " ".join(summary["tags"]), " ".join(summary["parameters"]),
+             " ".join(step["action"] or "" for step in summary["step_details"]), " ".join(targets))
+        )
+
+    def search(self, roots: List[Path], filters: Dict[str, Any], terms: List[str], limit: int, visible: Optional[set] = None) -> Optional[List[Dict[str, Any]]]:
+        """Query templates under roots by structured filters and ranked full-text terms
+        
+        Rows whose path is not in visible (templates shadowed by a
+        higher-precedence root) are skipped. None if the database is unavailable.
+        """
+        sql = ["SELECT t.name, t.title, t.description, t.path, t.type, t.steps FROM templates t"]
+        where = [f"t.base IN ({', '.join('?' * len(roots))})"]
+        params: List[Any] = [str(root) for root in roots]
+        
+        if terms:
+            sql.append("JOIN templates_fts ON templates_fts.rowid = t.id")
+            where.append("templates_fts MATCH ?")
+            params.append(" OR ".join('"' + term.replace('"', '""') + '"' for term in terms))
+        
+        step_conditions = []
+        for column in ("action", "workflow_id", "branch"):
+            if filters.get(column):
+                step_conditions.append(f"{column} = ?")
+                params.append(filters[column])
+        if step_conditions:
+            where.append(f"t.id IN (SELECT template_id FROM template_steps WHERE {' AND '.join(step_conditions)})")
+        if filters.get('tag'):
+            where.append("t.id IN (SELECT template_id FROM template_tags WHERE tag = ?)")
+            params.append(filters['tag'])
+        if filters.get('parameter'):
+            where.append("t.id IN (SELECT template_id FROM template_parameters WHERE name = ?)")
+            params.append(filters['parameter'])
+        if filters.get('template_type'):
+            where.append("t.type = ?")
+            params.append(filters['template_type'])
+        
+        sql.append("WHERE " + " AND ".join(where))
+        sql.append("ORDER BY bm25(templates_fts), t.name" if terms else "ORDER BY t.name")
+        
+        import sqlite3
+        start = time.perf_counter()
+        results = []
+        with self._lock:
+            if self.error is not None:
+                return None
+            try:
+                for name, title, description, path, template_type, steps in self._connect().execute(" ".join(sql), params):
+                    if visible is not None and path not in visible:
+                        continue
+                    results.append({"name": name, "title": title, "description": description, "path": path, "type": template_type, "steps": steps})
+                    if len(results) >= limit:
+                        break
+            except (sqlite3.Error, OSError) as error:
+                self._disable(error)
+                return None
+        SERVER_STATS.record_phase("catalog_db_query", time.perf_counter() - start)
+        return results
+
+CATALOG_DB = CatalogDB(Path(CATALOG_DB_PATH))
+
+class CatalogExporter:
+    """Versioned catalog snapshots with per-template content hashes, and deltas between them
+    
+    Every export stores the full state as <snapshot id>.jsonl in the snapshot
+    directory; the id is a hash of the (path, content hash) pairs, so an
+    unchanged catalog always exports the same id. Content hashes are reused
+    from the previous snapshot for template.yaml files whose (mtime, size)
+    did not change.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def export(self, roots: List[Path], fmt: str = "jsonl", since: Optional[str] = None, output: Optional[Path] = None) -> Dict[str, Any]:
+        previous = None
+        if since:
+            previous = self.load(since)
+            if previous is None:
+                raise KeyError(since)
+        
+        records = self.records(roots)
+        snapshot_id = hashlib.sha256(
+            "\n".join(f"{record['path']}\0{record['hash']}" for record in records).encode()
+        ).hexdigest()[:16]
+        header = {
+            "format": "billpay-catalog",
+            "version": SNAPSHOT_FORMAT_VERSION,
+            "snapshot_id": snapshot_id,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "roots": [str(root) for root in roots],
+            "templates": len(records)
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        state_path = self.directory / f"{snapshot_id}.jsonl"
+        if state_path.exists():
+            # Same catalog as an earlier export: it becomes the latest again
+            os.utime(state_path)
+        else:
+            self._write(state_path, "jsonl", {**header, "kind": "full"}, records)
+            self._prune()
+        
+        summary = {"snapshot_id": snapshot_id, "kind": "full", "format": fmt, "templates": len(records)}
+        lines = records
+        if previous is not None:
+            before = {record["path"]: record for record in previous}
+            after = {record["path"]: record for record in records}
+            lines = [
+                {"op": "removed", "path": path, "name": record["name"], "hash": record["hash"]}
+                for path, record in before.items() if path not in after
+            ]
+            for path, record in after.items():
+                if path not in before:
+                    lines.append({"op": "added", **record})
+                elif before[path]["hash"] != record["hash"]:
+                    lines.append({"op": "changed", **record})
+            lines.sort(key=lambda line: line["path"])
+            summary.update({
+                "kind": "delta",
+                "since": since,
+                "added": sum(line["op"] == "added" for line in lines),
+                "changed": sum(line["op"] == "changed" for line in lines),
+                "removed": sum(line["op"] == "removed" for line in lines)
+            })
+        
+        if output is None and previous is None and fmt == "jsonl":
+            output = state_path
+        else:
+            if output is None:
+                suffix = f".since-{since}" if since else ""
+                output = self.directory / f"{snapshot_id}{suffix}.{fmt}"
+            self._write(output, fmt, {**header, "kind": summary["kind"], "since": since}, lines)
+        summary["path"] = str(output)
+        summary["bytes"] = output.stat().st_size
+        return summary
+
+    def records(self, roots: List[Path]) -> List[Dict[str, Any]]:
+        """One record per visible template: identity, content hash and index summary"""
+        versions: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+        for root in roots:
+            if not root.is_dir():
+                continue
+            current_templates(root)
+            for key, version in TEMPLATE_INDEX.versions(root).items():
+                versions.setdefault(os.path.basename(os.path.dirname(key)), (key,) + version)
+        records = []
+        for key, mtime, size, template in sorted(versions.values()):
+            with self._lock:
+                cached = self._hashes.get(key)
+            if cached is None or cached[:2] != (mtime, size):
+                try:
+                    content_hash = self._hash_file(Path(key))
+                except FileNotFoundError:
+                    continue
+                with self._lock:
+                    self._hashes[key] = (mtime, size, content_hash)
+            else:
+                content_hash = cached[2]
+            records.append({
+                "name": template["name"],
+                "path": template["path"],
+                "hash": content_hash,
+                "mtime_ns": mtime,
+                "size": size,
+                "template": {field: template[field] for field in template if field != "path"}
+            })
+        return records
+
+    def load(self, snapshot_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Records of a stored snapshot, seeding the hash cache from it"""
+        if not re.fullmatch(r"[0-9a-f]{16}", snapshot_id):
+            return None
+        try:
+            with open(self.directory / f"{snapshot_id}.jsonl") as f:
+                records = [json.loads(line) for line in f][1:]
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            for record in records:
+                key = os.path.join(record["path"], "template.yaml")
+                self._hashes.setdefault(key, (record["mtime_ns"], record["size"], record["hash"]))
+        return records
+
+    def latest(self) -> Optional[str]:
+        """Id of the most recently written snapshot"""
+        try:
+            snapshots = [path for path in self.directory.iterdir() if re.fullmatch(r"[0-9a-f]{16}\.jsonl", path.name)]
+        except FileNotFoundError:
+            return None
+        return max(snapshots, key=lambda path: path.stat().st_mtime_ns).stem if snapshots else None
+
+    def _hash_file(self, path: Path) -> str:
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            data = f.read()
+        SERVER_STATS.record_phase("read", time.perf_counter() - start, len(data))
+        return hashlib.sha256(data).hexdigest()
+
+    def _write(self, path: Path, fmt: str, header: Dict[str, Any], lines: List[Dict[str, Any]]):
+        start = time.perf_counter()
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        if fmt == "msgpack":
+            import msgpack
+            packer = msgpack.Packer()
+            with open(tmp_path, "wb") as f:
+                f.write(packer.pack(header))
+                for line in lines:
+                    f.write(packer.pack(line))
+        else:
+            with open(tmp_path, "w") as f:
+                f.write(json.dumps(header, separators=(",", ":"), ensure_ascii=False) + "\n")
+                for line in lines:
+                    f.write(json.dumps(line, separators=(",", ":"), ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+        SERVER_STATS.record_phase("write", time.perf_counter() - start, path.stat().st_size)
+
+    def _prune(self):
+        """Keep the SNAPSHOT_KEEP newest snapshots, dropping exports derived from the others"""
+        snapshots = sorted(
+            (path for path in self.directory.iterdir() if re.fullmatch(r"[0-9a-f]{16}\.jsonl", path.name)),
+            key=lambda path: path.stat().st_mtime_ns
+        )
+        dropped = {path.stem for path in snapshots[:-SNAPSHOT_KEEP]}
+        for path in self.directory.iterdir():
+            if path.name[:16] in dropped:
+                path.unlink(missing_ok=True)
+
+CATALOG_EXPORTER = CatalogExporter(Path(SNAPSHOT_DIR))
+
+# Files indexed for references, and directories never descended into
+REFERENCE_SUFFIXES = (".yaml", ".yml", ".md", ".json")
+REFERENCE_SKIP_DIRS = {".git", "node_modules", "__pycache__", ".venv"}
+REFERENCE_MAX_FILE_SIZE = 1 << 20
+
+# Whole-token workflow IDs (*.yml/*.yaml) and template names (billpay-*); workflow IDs
+# are tried first so billpay-foo.yml is never read as the template name billpay-foo
+REFERENCE_PATTERN = re.compile(r"(?<![\w.-])(?:[\w-]+\.ya?ml|billpay-[\w-]*\w)(?![\w-])")
+
+# Events that change which indexable files exist under a watched directory, or their content
+REFERENCE_WATCH_MASK = IN_CLOSE_WRITE | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+
+class ReferenceWatcher:
+    """inotify on every directory ReferenceIndex walked, drained on demand
+    
+    No thread: the kernel queues events until the next lookup reads them.
+    Changes come out as ("file", path), ("tree", directory) for a directory that
+    appeared and ("gone", directory) for one that disappeared.
+    """
+
+    def __init__(self, roots: Tuple[str, ...]):
+        self.roots = roots
+        self._inotify = Inotify()
+        self._watches: Dict[int, str] = {}
+
+    def add(self, directory: str):
+        wd = self._inotify.add_watch(Path(directory), REFERENCE_WATCH_MASK)
+        if wd is not None:
+            self._watches[wd] = directory
+
+    def drain(self) -> Tuple[List[Tuple[str, str]], bool]:
+        """Queued changes in order, and whether the kernel queue overflowed (events lost)"""
+        changes = []
+        overflowed = False
+        events = self._inotify.read(0)
+        while events:
+            for wd, mask, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    overflowed = True
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._watches[wd]
+                    continue
+                path = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if name in REFERENCE_SKIP_DIRS:
+                        continue
+                    if mask & (IN_DELETE | IN_MOVED_FROM):
+                        changes.append(("gone", path))
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        changes.append(("tree", path))
+                elif name.endswith(REFERENCE_SUFFIXES):
+                    changes.append(("file", path))
+            events = self._inotify.read(0)
+        return changes, overflowed
+
+    def close(self):
+        self._inotify.close()
+        self._watches.clear()
+
+class ReferenceIndex:
+    """Inverted index from template names and workflow IDs to the files and lines mentioning them
+    
+    Files are keyed on (mtime, size) like TemplateIndex, and write_text keeps it
+    current for our own writes. The first refresh walks the roots; with a
+    ReferenceWatcher the next ones only look at the paths it reports, so a
+    lookup costs the changes since the last one rather than a walk of the tree.
+    """
+
+    def __init__(self):
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, set] = {}
+        self._refreshed: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        # Serializes refreshes, which share the watcher
+        self._refresh_lock = threading.Lock()
+        self._watcher: Optional[ReferenceWatcher] = None
+        self._watch_unavailable = False
+
+    def refresh(self, roots: List[Path], max_age: float = 0.0):
+        """Sync with every indexable file under roots, reading only changed ones"""
+        roots = [str(root) for root in roots]
+        key = tuple(roots)
+        with self._refresh_lock:
+            watcher = self._watcher
+            if watcher is not None and watcher.roots == key:
+                try:
+                    changes, overflowed = watcher.drain()
+                    if not overflowed:
+                        self._apply(changes, watcher)
+                        return
+                except OSError:
+                    # Out of watches or similar: back to walking the roots
+                    self._stop_watching()
+                    self._watch_unavailable = True
+            
+            with self._lock:
+                refreshed = self._refreshed.get(key)
+            if max_age > 0 and refreshed is not None and time.monotonic() - refreshed <= max_age and self._watcher is None:
+                return
+            
+            watcher = self._watch(key)
+            seen, changed = self._walk(roots, watcher)
+            self._read(changed)
+            
+            prefixes = tuple(root.rstrip(os.sep) + os.sep for root in roots)
+            with self._lock:
+                for stale in [path for path in self._files if path.startswith(prefixes) and path not in seen]:
+                    self._remove(stale)
+                self._refreshed[key] = time.monotonic()
+
+    def _watch(self, key: Tuple[str, ...]) -> Optional[ReferenceWatcher]:
+        """The watcher for these roots, starting one if REFERENCE_WATCH allows"""
+        if self._watcher is not None and self._watcher.roots == key:
+            return self._watcher
+        self._stop_watching()
+        if REFERENCE_WATCH != "auto" or self._watch_unavailable:
+            return None
+        try:
+            self._watcher = ReferenceWatcher(key)
+        except OSError:
+            self._watch_unavailable = True
+        return self._watcher
+
+    def _stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+
+    def _walk(self, directories: List[str], watcher: Optional[ReferenceWatcher]) -> Tuple[set, List[Tuple[str, os.stat_result]]]:
+        """Indexable files under directories, and those that changed since indexed
+        
+        Each directory is watched before it is listed, so nothing created in
+        between is missed. Running out of watches drops the watcher.
+        """
+        seen = set()
+        changed = []
+        start = time.perf_counter()
+        stack = list(directories)
+        while stack:
+            directory = stack.pop()
+            if watcher is not None:
+                try:
+                    watcher.add(directory)
+                except OSError:
+                    self._stop_watching()
+                    self._watch_unavailable = True
+                    watcher = None
+            try:
+                it = os.scandir(directory)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+            with it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in REFERENCE_SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.name.endswith(REFERENCE_SUFFIXES) and entry.path not in seen:
+                        stat = entry.stat()
+                        if stat.st_size > REFERENCE_MAX_FILE_SIZE:
+                            continue
+                        seen.add(entry.path)
+                        with self._lock:
+                            cached = self._files.get(entry.path)
+                        if cached is None or cached["mtime"] != stat.st_mtime_ns or cached["size"] != stat.st_size:
+                            changed.append((entry.path, stat))
+        SERVER_STATS.record_phase("scan", time.perf_counter() - start)
+        return seen, changed
+
+    def _read(self, changed: List[Tuple[str, os.stat_result]]):
+        for path, stat in changed:
+            try:
+                content = read_text(Path(path))
+            except (OSError, UnicodeDecodeError):
+                continue
+            self._index(path, stat.st_mtime_ns, stat.st_size, content)
+
+    def _apply(self, changes: List[Tuple[str, str]], watcher: ReferenceWatcher):
+        """Bring the paths a watcher reported up to date"""
+        start = time.perf_counter()
+        changed = []
+        # Last occurrence of each change wins: a directory removed then recreated is walked
+        for kind, path in list(dict.fromkeys(reversed(changes)))[::-1]:
+            if kind == "file":
+                try:
+                    stat = os.stat(path)
+                except (FileNotFoundError, NotADirectoryError):
+                    stat = None
+                with self._lock:
+                    cached = self._files.get(path)
+                    if stat is None or stat.st_size > REFERENCE_MAX_FILE_SIZE:
+                        self._remove(path)
+                        continue
+                if cached is None or cached["mtime"] != stat.st_mtime_ns or cached["size"] != stat.st_size:
+                    changed.append((path, stat))
+            elif kind == "gone":
+                prefix = path + os.sep
+                with self._lock:
+                    for stale in [indexed for indexed in self._files if indexed.startswith(prefix)]:
+                        self._remove(stale)
+            else:
+                changed.extend(self._walk([path], watcher)[1])
+        SERVER_STATS.record_phase("reference_events", time.perf_counter() - start)
+        self._read(changed)
+
+    def update_file(self, path: Path, content: str):
+        """Re-index a file we just wrote"""
+        if not path.name.endswith(REFERENCE_SUFFIXES):
+            return
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return
+        self._index(str(path), stat.st_mtime_ns, stat.st_size, content)
+
+    def move(self, old_directory: Path, new_directory: Path):
+        """Re-key the files of a renamed directory without re-reading them"""
+        old_prefix = str(old_directory) + os.sep
+        with self._lock:
+            for path in [path for path in self._files if path.startswith(old_prefix)]:
+                entry = self._files[path]
+                self._remove(path)
+                self._add(str(new_directory) + os.sep + path[len(old_prefix):], entry)
+
+    def lookup(self, token: str) -> Dict[str, List[int]]:
+        """Files mentioning token, with the 1-based lines where it appears"""
+        with self._lock:
+            return {path: self._files[path]["tokens"][token] for path in sorted(self._postings.get(token, ()))}
+
+    def _index(self, path: str, mtime: int, size: int, content: str):
+        tokens: Dict[str, List[int]] = {}
+        for number, line in enumerate(content.splitlines(), 1):
+            for match in REFERENCE_PATTERN.finditer(line):
+                lines = tokens.setdefault(match.group(0), [])
+                if not lines or lines[-1] != number:
+                    lines.append(number)
+        with self._lock:
+            self._remove(path)
+            self._add(path, {"mtime": mtime, "size": size, "tokens": tokens})
+
+    def _add(self, path: str, entry: Dict[str, Any]):
+        self._files[path] = entry
+        for token in entry["tokens"]:
+            self._postings.setdefault(token, set()).add(path)
+
+    def _remove(self, path: str):
+        entry = self._files.pop(path, None)
+        if entry is None:
+            return
+        for token in entry["tokens"]:
+            paths = self._postings.get(token)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self._postings[token]
+
+REFERENCE_INDEX = ReferenceIndex()
+
+def reference_roots() -> List[Path]:
+    """The templates base plus REFERENCE_ROOTS, without roots nested in another"""
+    roots = sorted({os.path.abspath(root) for root in template_roots() + [Path(root) for root in REFERENCE_ROOTS]})
+    kept = []
+    for root in roots:
+        if not any(root.startswith(parent.rstrip(os.sep) + os.sep) for parent in kept):
+            kept.append(root)
+    return [Path(root) for root in kept]
+
+def find_references(reference: str, exclude: Optional[Path] = None) -> Dict[str, List[int]]:
+    """Files referencing a template name or workflow ID, optionally outside one directory"""
+    REFERENCE_INDEX.refresh(reference_roots(), REFERENCE_MAX_STALENESS)
+    references = REFERENCE_INDEX.lookup(reference)
+    if exclude is not None:
+        prefix = str(exclude) + os.sep
+        references = {path: lines for path, lines in references.items() if not path.startswith(prefix)}
+    return references
+
+def owning_template(path: str) -> Optional[Path]:
+    """Template directory under one of the template roots that contains path, if any"""
+    for root in template_roots():
+        relative = os.path.relpath(path, root)
+        if not relative.startswith(os.pardir) and os.sep in relative:
+            return root / relative.split(os.sep, 1)[0]
+    return None
+
+def template_roots() -> List[Path]:
+    """Every template root in precedence order: TEMPLATES_BASE, then TEMPLATE_ROOTS"""
+    roots: List[Path] = []
+    for root in [TEMPLATES_BASE] + TEMPLATE_ROOTS:
+        root_path = Path(os.path.expanduser(root))
+        if root_path not in roots:
+            roots.append(root_path)
+    return roots
+
+def resolve_template_path(template_name: str) -> Optional[Path]:
+    """Directory of a template in the highest-precedence root that has it"""
+    for root in template_roots():
+        template_path = root / template_name
+        if template_path.is_dir():
+            return template_path
+    return None
+
+def merge_by_precedence(roots: List[Path], per_root: List[Any], name: Callable[[Any], str]) -> List[Any]:
+    """Merge per-root lists (in precedence order), keeping the first item per template name"""
+    merged: Dict[str, Any] = {}
+    for root, items in zip(roots, per_root):
+        if isinstance(items, FileNotFoundError) and not root.is_dir():
+            # A configured root that does not exist (yet) contributes nothing
+            continue
+        if isinstance(items, BaseException):
+            raise items
+        for item in items:
+            merged.setdefault(name(item), item)
+    return list(merged.values())
+
+class TemplateContext:
+    """Everything a RuleSet knows about one template while it runs"""
+
+    def __init__(self, template_path: Path, present: set, contents: Dict[str, str], read_errors: Optional[Dict[str, str]] = None):
+        self.template_path = template_path
+        self.present = present
+        self.contents = contents
+        self.read_errors = read_errors or {}
+        self.new_contents = dict(contents)
+        self.data: Dict[str, Any] = {}
+        self.root: Optional["yaml.Node"] = None
+        self.template_type: Optional[str] = None
+        self.issues: List[Dict[str, str]] = []
+        self.fixes: List[str] = []
+        self.edits: List[Tuple[Tuple[Any, ...], Any]] = []
+        self.scratch: Dict[str, Any] = {}
+
+    def report(self, code: str, message: str):
+        self.issues.append({"code": code, "message": message})
+
+    def set_value(self, path: Tuple[Any, ...], value: Any):
+        """Change a template.yaml scalar in the parsed tree and queue the in-place patch"""
+        node = self.data
+        for key in path[:-1]:
+            node = node[key]
+        node[path[-1]] = value
+        self.edits.append((path, value))
+
+class TemplateRule:
+    """Base class for validation rules compiled from TEMPLATE_STANDARDS
+    
+    A rule lists the files it needs to exist (required_files) or to read
+    (reads) and the template.yaml paths it inspects (selectors, where "*"
+    matches every key or index). The RuleSet lists each template's files and
+    walks its document once, calling visit() for selected nodes, then finish().
+    Rules that can repair what they find do so when fix is True.
+    """
+    code = ""
+    required_files: Tuple[str, ...] = ()
+    reads: Tuple[str, ...] = ()
+    selectors: Tuple[Tuple[Any, ...], ...] = ()
+    needs_document = False
+
+    def __init__(self, standards: Dict[str, Any]):
+        self.standards = standards
+
+    def visit(self, ctx: TemplateContext, path: Tuple[Any, ...], value: Any, fix: bool):
+        pass
+
+    def finish(self, ctx: TemplateContext, fix: bool):
+        pass
+
+class RequiredFilesRule(TemplateRule):
+    code = "missing_file"
+
+    def __init__(self, standards: Dict[str, Any]):
+        super().__init__(standards)
+        self.required_files = tuple(standards["required_files"])
+
+    def finish(self, ctx: TemplateContext, fix: bool):
+        for required_file in self.required_files:
+            if required_file not in ctx.present:
+                ctx.report(self.code, f"Missing required file: {required_file}")
+
+class NamingRule(TemplateRule):
+    code = "naming"
+    selectors = (("metadata", "name"),)
+    needs_document = True
+
+    def __init__(self, standards: Dict[str, Any]):
+        super().__init__(standards)
+        self.prefix = standards["naming_convention"].split("{", 1)[0]
+
+    def visit(self, ctx: TemplateContext, path: Tuple[Any, ...], value: Any, fix: bool):
+        ctx.scratch[self.code] = value
+
+    def finish(self, ctx: TemplateContext, fix: bool):
+        if not str(ctx.scratch.get(self.code, '')).startswith(self.prefix):
+            ctx.report(self.code, f"Template name doesn't follow '{self.standards['naming_convention']}' convention")
+
+class TemplateTypeRule(TemplateRule):
+    """Not a check: records the template type from the dispatched workflow"""
+    selectors = (("spec", "steps", "*"),)
+    needs_document = True
+
+    def visit(self, ctx: TemplateContext, path: Tuple[Any, ...], value: Any, fix: bool):
+        if ctx.template_type is None and isinstance(value, dict) and value.get('action') == 'github:actions:dispatch':
+            ctx.template_type = detect_template_type({"spec": {"steps": [value]}})
+
+class DispatchBranchRule(TemplateRule):
+    code = "dispatch_branch"
+    selectors = (("spec", "steps", "*"),)
+    needs_document = True
+
+    def __init__(self, standards: Dict[str, Any]):
+        super().__init__(standards)
+        self.target_branch = standards["branch_config"]["ia_ops_iac"]
+
+    def visit(self, ctx: TemplateContext, path: Tuple[Any, ...], step: Any, fix: bool):
+        if not isinstance(step, dict) or step.get('action') != 'github:actions:dispatch':
+            return
+        step_input = step.get('input') if isinstance(step.get('input'), dict) else {}
+        branch = step_input.get('branchOrTagName')
+        if branch == self.target_branch:
+            return
+        if fix:
+            if not isinstance(step.get('input'), dict):
+                step['input'] = {}
+            ctx.set_value(path + ("input", "branchOrTagName"), self.target_branch)
+            ctx.fixes.append(f"Fixed step '{step.get('id')}': {branch} → {self.target_branch}")
+        else:
+            ctx.report(self.code, f"Step '{step.get('id')}' uses branch '{branch}', should use '{self.target_branch}'")
+
+class WorkflowTriggersRule(TemplateRule):
+    code = "workflow_triggers"
+    workflow_file = "skeleton/.github/workflows/deploy.yml"
+    reads = (workflow_file,)
+
+    def __init__(self, standards: Dict[str, Any]):
+        super().__init__(standards)
+        self.triggers = standards["branch_config"]["workflow_triggers"]
+
+    def finish(self, ctx: TemplateContext, fix: bool):
+        content = ctx.new_contents.get(self.workflow_file)
+        if content is None:
+            return
+        added = []
+        
+        def add_triggers(match):
+            branches = [branch.strip() for branch in match.group(1).split(",") if branch.strip()]
+            missing = [branch for branch in self.triggers if branch not in branches]
+            if not branches or not set(branches) <= set(self.triggers) or not missing:
+                return match.group(0)
+            added.extend(branch for branch in missing if branch not in added)
+            return f"branches: [{', '.join(branches + missing)}]"
+        
+        new_content = re.sub(r"branches: \[([^\]\n]*)\]", add_triggers, content)
+        if new_content == content:
+            return
+        if fix:
+            ctx.new_contents[self.workflow_file] = new_content
+            ctx.fixes.append(f"Fixed workflow: Added {', '.join(sorted(added))} to trigger branches")
+        else:
+            ctx.report(self.code, f"Workflow trigger branches missing: {', '.join(sorted(added))}")
+
+# Rules compiled from TEMPLATE_STANDARDS, in reporting order; append to plug in more
+RULE_FACTORIES: List[Callable[[Dict[str, Any]], TemplateRule]] = [
+    RequiredFilesRule,
+    NamingRule,
+    TemplateTypeRule,
+    DispatchBranchRule,
+    WorkflowTriggersRule
+]
+
+# Rule codes fix_template_branches is allowed to repair
+BRANCH_RULE_CODES = {"dispatch_branch", "workflow_triggers"}
+
+# Issue code for a template.yaml that is not valid YAML or not a mapping; the
+# document rules are skipped for it rather than failing the whole report
+PARSE_ERROR = "parse_error"
+
+# Issue code for a listed file that could not be read (removed mid-scan, not UTF-8, ...)
+READ_ERROR = "read_error"
+
+class RuleSet:
+    """Rules compiled into one file listing and one document walk per template"""
+
+    def __init__(self, rules: List[TemplateRule]):
+        self.rules = rules
+        self.order = {code: position for position, code in enumerate([READ_ERROR, PARSE_ERROR] + [rule.code for rule in rules])}
+        self.reads = tuple(dict.fromkeys(("template.yaml",) + tuple(path for rule in rules for path in rule.reads)))
+        self.watched_files = tuple(dict.fromkeys(
+            self.reads + tuple(path for rule in rules for path in rule.required_files)
+        ))
+        
+        # Selector trie: {"rules": [...], "children": {key: subtrie}}
+        self.selectors: Dict[str, Any] = {"rules": [], "children": {}}
+        for rule in rules:
+            for selector in rule.selectors:
+                node = self.selectors
+                for key in selector:
+                    node = node["children"].setdefault(key, {"rules": [], "children": {}})
+                node["rules"].append(rule)
+
+    def collect(self, template_path: Path) -> TemplateContext:
+        """List the template's watched files once and read the ones rules need"""
+        present = set()
+        by_directory: Dict[str, List[str]] = {}
+        for relative in self.watched_files:
+            by_directory.setdefault(os.path.dirname(relative), []).append(relative)
+        start = time.perf_counter()
+        for directory, files in by_directory.items():
+            try:
+                with os.scandir(template_path / directory) as it:
+                    names = {entry.name for entry in it}
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            present.update(relative for relative in files if os.path.basename(relative) in names)
+        SERVER_STATS.record_phase("scan", time.perf_counter() - start)
+        
+        contents = {}
+        read_errors = {}
+        for relative in self.reads:
+            if relative in present:
+                try:
+                    contents[relative] = read_text(template_path / relative)
+                except (OSError, UnicodeDecodeError) as error:
+                    read_errors[relative] = str(error)
+        return TemplateContext(template_path, present, contents, read_errors)
+
+    def evaluate(self, ctx: TemplateContext, fix: bool = False, codes: Optional[set] = None) -> TemplateContext:
+        """Run the rules over a collected template, optionally repairing what they can"""
+        rules = [rule for rule in self.rules if codes is None or not rule.code or rule.code in codes]
+        for relative, error in ctx.read_errors.items():
+            ctx.report(READ_ERROR, f"{relative} could not be read: {error}")
+        content = ctx.contents.get("template.yaml")
+        has_document = content is not None
+        if has_document:
+            try:
+                if fix:
+                    data, ctx.root = compose_yaml(content)
+                else:
+                    data = load_yaml(content)
+            except yaml_backend()[0].YAMLError as error:
+                mark = getattr(error, "problem_mark", None)
+                where = f" (line {mark.line + 1}, column {mark.column + 1})" if mark is not None else ""
+                ctx.report(PARSE_ERROR, f"template.yaml is not valid YAML{where}: {getattr(error, 'problem', None) or error}")
+                has_document = False
+            else:
+                if isinstance(data, dict):
+                    ctx.data = data
+                    self._walk(ctx.data, self.selectors, (), ctx, fix, set(rules))
+                else:
+                    ctx.report(PARSE_ERROR, f"template.yaml must be a mapping, got {type(data).__name__}")
+                    has_document = False
+        
+        for rule in rules:
+            if has_document or not rule.needs_document:
+                rule.finish(ctx, fix)
+        ctx.issues.sort(key=lambda issue: self.order.get(issue["code"], len(self.order)))
+        return ctx
+
+    def _walk(self, value: Any, trie: Dict[str, Any], path: Tuple[Any, ...], ctx: TemplateContext, fix: bool, active: set):
+        for rule in trie["rules"]:
+            if rule in active:
+                rule.visit(ctx, path, value, fix)
+        for key, child in trie["children"].items():
+            if key == "*":
+                if isinstance(value, dict):
+                    items = list(value.items())
+                elif isinstance(value, list):
+                    items = list(enumerate(value))
+                else:
+                    items = []
+            elif isinstance(value, dict) and key in value:
+                items = [(key, value[key])]
+            else:
+                items = []
+            for child_key, child_value in items:
+                self._walk(child_value, child, path + (child_key,), ctx, fix, active)
+
+_ruleset_cache: Dict[str, RuleSet] = {}
+
+def get_ruleset() -> RuleSet:
+    """Rules compiled for the current TEMPLATE_STANDARDS, recompiled when they change"""
+    fingerprint = standards_fingerprint()
+    ruleset = _ruleset_cache.get(fingerprint)
+    if ruleset is None:
+        ruleset = RuleSet([factory(TEMPLATE_STANDARDS) for factory in RULE_FACTORIES])
+        _ruleset_cache.clear()
+        _ruleset_cache[fingerprint] = ruleset
+    return ruleset
+
+def standards_fingerprint() -> str:
+    """Hash of everything validation depends on besides the template itself"""
+    standards = json.dumps(
+        [VALIDATION_RULES_VERSION, TEMPLATE_STANDARDS, TEMPLATE_TYPES, [factory.__name__ for factory in RULE_FACTORIES]],
+        sort_keys=True
+    )
+    return hashlib.sha256(standards.encode()).hexdigest()
+
 app = Server("billpay-template-manager")
 
 @app.list_tools()
 async def list_tools() -> List[Tool]:
-    return [
+    return build_tools()
+
+@lru_cache(maxsize=None)
+def build_tools() -> List[Tool]:
+    """Every Tool and its inputSchema, built once per process and reused by each list_tools"""
+    tools = [
         Tool(
             name="create_template",
             description="Create a new Backstage template following BillPay standards",
@@ -75,28 +2019,79 @@ async def list_tools() -> List[Tool]:
                 "required": ["template_name", "template_type", "description"]
             }
         ),
+        Tool(
+            name="create_templates",
+            description="Create many Backstage templates in one call (bulk scaffolding)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "templates": {
+                        "type": "array",
+                        "description": "Template specs, same fields as create_template",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "template_name": {"type": "string", "description": "Template name (without billpay- prefix)"},
+                                "template_type": {"type": "string", "enum": list(TEMPLATE_TYPES.keys())},
+                                "description": {"type": "string", "description": "Template description"},
+                                "cloud_providers": {"type": "array", "items": {"type": "string"}, "default": ["aws"]},
+                                "deployment_types": {"type": "array", "items": {"type": "string"}, "default": ["simulation", "real-aws-oidc"]}
+                            },
+                            "required": ["template_name", "template_type", "description"]
+                        }
+                    }
+                },
+                "required": ["templates"]
+            }
+        ),
         Tool(
             name="validate_template",
             description="Validate existing template against BillPay standards",
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "template_name": {"type": "string", "description": "Template name to validate"}
+                    "template_name": {"type": "string", "description": "Template name to validate"},
+                    "fix": {"type": "boolean", "description": "Also repair every auto-fixable issue in the same pass", "default": False}
                 },
                 "required": ["template_name"]
             }
         ),
+        Tool(
+            name="validate_all_templates",
+            description="Validate every template in the catalog and return a JSON summary",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "name_pattern": {"type": "string", "description": "Glob on template directory names", "default": "billpay-*"},
+                    "template_type": {"type": "string", "enum": list(TEMPLATE_TYPES.keys())},
+                    "include_valid": {"type": "boolean", "description": "Also list templates without issues", "default": False}
+                }
+            }
+        ),
         Tool(
             name="fix_template_branches",
             description="Fix branch inconsistencies in template",
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "template_name": {"type": "string", "description": "Template name to fix"}
+                    "template_name": {"type": "string", "description": "Template name to fix"},
+                    "dry_run": {"type": "boolean", "description": "Return a unified diff instead of writing", "default": False}
                 },
                 "required": ["template_name"]
             }
         ),
+        Tool(
+            name="fix_all_template_branches",
+            description="Fix branch inconsistencies across every matching template",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "name_pattern": {"type": "string", "description": "Glob on template directory names", "default": "billpay-*"},
+                    "template_type": {"type": "string", "enum": list(TEMPLATE_TYPES.keys())},
+                    "dry_run": {"type": "boolean", "description": "Return unified diffs instead of writing", "default": False}
+                }
+            }
+        ),
         Tool(
             name="rename_template",
             description="Rename template following naming conventions",
@@ -104,35 +2099,187 @@ async def list_tools() -> List[Tool]:
                 "type": "object",
                 "properties": {
                     "old_name": {"type": "string", "description": "Current template name"},
-                    "new_purpose": {"type": "string", "description": "New purpose for naming"}
+                    "new_purpose": {"type": "string", "description": "New purpose for naming"},
+                    "update_references": {"type": "boolean", "description": "Also rewrite references in other templates, catalog entries and docs", "default": True},
+                    "max_files": {"type": "integer", "description": "Refuse to rename when more files than this reference the template", "minimum": 0, "default": REFERENCE_MAX_UPDATES}
                 },
                 "required": ["old_name", "new_purpose"]
             }
         ),
+        Tool(
+            name="find_dependents",
+            description="Show the files that reference a template name or workflow ID",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "reference": {"type": "string", "description": "Template name (billpay-*) or workflow ID (e.g. deploy-complete.yml)"},
+                    "include_self": {"type": "boolean", "description": "Include files inside the template's own directory", "default": False}
+                },
+                "required": ["reference"]
+            }
+        ),
         Tool(
             name="list_templates",
-            description="List all templates with their status and configuration",
-            inputSchema={"type": "object", "properties": {}}
+            description="List templates page by page with their status and configuration",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "cursor": {"type": "string", "description": "next_cursor from the previous page"},
+                    "limit": {"type": "integer", "minimum": 1, "maximum": MAX_LIST_LIMIT, "default": DEFAULT_LIST_LIMIT},
+                    "name_prefix": {"type": "string", "description": "Only templates whose name starts with this"},
+                    "tag": {"type": "string", "description": "Only templates carrying this metadata tag"},
+                    "template_type": {"type": "string", "enum": list(TEMPLATE_TYPES.keys())},
+                    "min_steps": {"type": "integer", "minimum": 0},
+                    "max_steps": {"type": "integer", "minimum": 0},
+                    "sort": {"type": "string", "enum": list(LIST_SORT_KEYS.keys()), "default": "name"},
+                    "format": {"type": "string", "enum": ["text", "json"], "default": "text"}
+                }
+            }
+        ),
+        Tool(
+            name="search_templates",
+            description="Search templates by metadata, tags, parameters, step actions and deployment targets",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Free text, e.g. 'templates dispatching deploy-complete.yml on branch main'"},
+                    "workflow_id": {"type": "string", "description": "Dispatched workflow, e.g. deploy-complete.yml"},
+                    "branch": {"type": "string", "description": "Dispatch branchOrTagName"},
+                    "action": {"type": "string", "description": "Step action, e.g. github:actions:dispatch"},
+                    "tag": {"type": "string"},
+                    "parameter": {"type": "string", "description": "Parameter property name"},
+                    "template_type": {"type": "string", "enum": list(TEMPLATE_TYPES.keys())},
+                    "limit": {"type": "integer", "minimum": 1, "maximum": MAX_LIST_LIMIT, "default": 20}
+                }
+            }
+        ),
+        Tool(
+            name="export_catalog",
+            description="Export the whole catalog as a versioned snapshot file with per-template content hashes, or only the changes since an earlier snapshot",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "format": {"type": "string", "enum": ["jsonl", "msgpack"], "default": "jsonl", "description": "msgpack requires the msgpack package"},
+                    "since": {"type": "string", "description": "Snapshot ID (or 'latest') to export a delta against: only added, changed and removed templates"},
+                    "output": {"type": "string", "description": "File to write (default: the snapshot directory)"}
+                }
+            }
+        ),
+        Tool(
+            name="server_stats",
+            description="Per-tool call counts, latency histograms, I/O bytes and YAML time",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "reset": {"type": "boolean", "description": "Clear the counters after reading them", "default": False}
+                }
+            }
         )
     ]
+    for tool in tools:
+        tool.inputSchema.setdefault("properties", {})["profile"] = {
+            "type": "boolean",
+            "description": f"Write cProfile and tracemalloc dumps of this call to {PROFILE_DIR}",
+            "default": False
+        }
+    return tools
+
+_inflight: Dict[Tuple[str, str], asyncio.Future] = {}
 
 @app.call_tool()
 async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
+    token = CURRENT_TOOL.set(name)
+    start = time.perf_counter()
+    failed = False
+    try:
+        call_profile = TOOL_PROFILER.begin(name, arguments)
+        if call_profile is not None:
+            return await profiled_dispatch(call_profile, name, arguments)
+        if arguments.get('profile'):
+            result = await dispatch_tool(name, arguments)
+            return list(result) + [TextContent(type="text", text="⚠️ Not profiled: another call is being profiled")]
+        
+        key = coalesce_key(name, arguments)
+        if key is None:
+            return await dispatch_tool(name, arguments)
+        
+        task = _inflight.get(key)
+        if task is None:
+            task = _inflight[key] = asyncio.ensure_future(dispatch_tool(name, arguments))
+            task.add_done_callback(lambda _: _inflight.pop(key, None))
+        else:
+            SERVER_STATS.record_phase("coalesced", 0)
+        # Shielded so one caller going away does not cancel the others' result
+        return await asyncio.shield(task)
+    except Exception:
+        failed = True
+        raise
+    finally:
+        SERVER_STATS.record_call(name, time.perf_counter() - start, failed)
+        CURRENT_TOOL.reset(token)
+
+async def profiled_dispatch(call_profile: CallProfile, name: str, arguments: Dict[str, Any]) -> List[TextContent]:
+    """Dispatch under a CallProfile, then write its dumps off the event loop"""
+    token = CURRENT_PROFILE.set(call_profile)
+    try:
+        result = await dispatch_tool(name, arguments)
+    finally:
+        # Failed calls are the interesting ones, so their dumps are written too
+        CURRENT_PROFILE.reset(token)
+        try:
+            stats, snapshot, summary = TOOL_PROFILER.end(call_profile)
+            path = await run_blocking(TOOL_PROFILER.write, name, stats, snapshot, summary)
+            note = f"📈 Profile: {path.with_suffix('.prof') if stats is not None else 'cProfile unavailable'} (allocations: {path.with_suffix('.tracemalloc')}, summary: {path})"
+        except Exception as error:
+            # Profiling must never fail the call it observes
+            TOOL_PROFILER.record_failure()
+            note = f"⚠️ Profiling failed: {error}"
+    if arguments.get('profile'):
+        result = list(result) + [TextContent(type="text", text=note)]
+    return result
+
+def coalesce_key(name: str, arguments: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """Identity of a read-only call, or None when it must run on its own"""
+    if name not in COALESCED_TOOLS or arguments.get('fix') or arguments.get('profile'):
+        return None
+    try:
+        return name, json.dumps(arguments, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+
+async def dispatch_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
     if name == "create_template":
         return await create_template(arguments)
+    elif name == "create_templates":
+        return await create_templates(arguments)
     elif name == "validate_template":
         return await validate_template(arguments)
+    elif name == "validate_all_templates":
+        return await validate_all_templates(arguments)
     elif name == "fix_template_branches":
         return await fix_template_branches(arguments)
+    elif name == "fix_all_template_branches":
+        return await fix_all_template_branches(arguments)
     elif name == "rename_template":
         return await rename_template(arguments)
+    elif name == "find_dependents":
+        return await find_dependents(arguments)
     elif name == "list_templates":
         return await list_templates(arguments)
+    elif name == "search_templates":
+        return await search_templates(arguments)
+    elif name == "export_catalog":
+        return await export_catalog(arguments)
+    elif name == "server_stats":
+        return await server_stats(arguments)
     else:
         return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
 async def create_template(args: Dict[str, Any]) -> List[TextContent]:
     """Create a new template following BillPay standards"""
+    return await run_blocking(create_template_sync, args)
+
+def create_template_sync(args: Dict[str, Any]) -> List[TextContent]:
     template_name = f"billpay-{args['template_name']}"
     template_type = args['template_type']
     description = args['description']
@@ -141,19 +2288,7 @@ async def create_template(args: Dict[str, Any]) -> List[TextContent]:
         return [TextContent(type="text", text=f"❌ Invalid template type. Use: {list(TEMPLATE_TYPES.keys())}")]
     
     template_config = TEMPLATE_TYPES[template_type]
-    template_path = Path(TEMPLATES_BASE) / template_name
-    
-    # Create directory structure
-    template_path.mkdir(exist_ok=True)
-    (template_path / "skeleton" / ".github" / "workflows").mkdir(parents=True, exist_ok=True)
-    
-    # Generate template.yaml
-    template_yaml = generate_template_yaml(template_name, template_type, description, args)
-    with open(template_path / "template.yaml", "w") as f:
-        yaml.dump(template_yaml, f, default_flow_style=False, sort_keys=False)
-    
-    # Generate skeleton files
-    generate_skeleton_files(template_path / "skeleton", template_name, template_config, args)
+    template_path = write_template(template_name, template_type, description, args)
     
     return [TextContent(
         type="text", 
@@ -164,99 +2299,436 @@ async def create_template(args: Dict[str, Any]) -> List[TextContent]:
              f"🔧 Steps: {template_config['steps']}"
     )]
 
+async def create_templates(args: Dict[str, Any]) -> List[TextContent]:
+    """Create many templates in one call, writing their directories concurrently"""
+    specs = args.get('templates', [])
+    errors = []
+    seen = set()
+    valid = []
+    for spec in specs:
+        template_name = spec.get('template_name')
+        if not template_name or not spec.get('description'):
+            errors.append({"template_name": template_name, "error": "template_name and description are required"})
+        elif spec.get('template_type') not in TEMPLATE_TYPES:
+            errors.append({"template_name": template_name, "error": f"Invalid template type. Use: {list(TEMPLATE_TYPES.keys())}"})
+        elif template_name in seen:
+            errors.append({"template_name": template_name, "error": "Duplicate template_name in batch"})
+        else:
+            seen.add(template_name)
+            valid.append(spec)
+    
+    paths = await asyncio.gather(*(
+        run_blocking(write_template, f"billpay-{spec['template_name']}", spec['template_type'], spec['description'], spec, False)
+        for spec in valid
+    ), return_exceptions=True)
+    
+    created = []
+    for spec, path in zip(valid, paths):
+        if isinstance(path, Exception):
+            errors.append({"template_name": spec['template_name'], "error": str(path)})
+        else:
+            created.append({"name": path.name, "type": spec['template_type'], "path": str(path)})
+    
+    report = {"requested": len(specs), "created": len(created), "failed": len(errors), "templates": created, "errors": errors}
+    return [TextContent(type="text", text=json.dumps(report, separators=(",", ":"), ensure_ascii=False))]
+
+def write_template(template_name: str, template_type: str, description: str, args: Dict[str, Any], exist_ok: bool = True) -> Path:
+    """Write a template directory from its pre-rendered parts and index it
+    
+    With exist_ok False, a template of that name in any root raises FileExistsError
+    instead of being overwritten.
+    """
+    template_path = template_roots()[0] / template_name
+    template_yaml, content = render_template_yaml(template_name, template_type, description, args)
+    
+    with TEMPLATE_LOCKS.hold(template_path):
+        if not exist_ok:
+            existing = resolve_template_path(template_name)
+            if existing is not None:
+                raise FileExistsError(f"Template already exists: {existing}")
+        # Create directory structure
+        template_path.mkdir(exist_ok=exist_ok)
+        (template_path / "skeleton" / ".github" / "workflows").mkdir(parents=True, exist_ok=True)
+        
+        # Generate template.yaml
+        write_text(template_path / "template.yaml", content)
+        TEMPLATE_INDEX.update(template_path / "template.yaml", template_yaml)
+        
+        # Generate skeleton files
+        generate_skeleton_files(template_path / "skeleton", template_name, template_type, args)
+    return template_path
+
+def render_key(template_type: str, args: Dict[str, Any]) -> Tuple[str, Tuple[str, ...], Tuple[str, ...]]:
+    """Everything a template's spec and skeleton depend on, as a hashable cache key"""
+    return (
+        template_type,
+        tuple(args.get('cloud_providers', ['aws'])),
+        tuple(args.get('deployment_types', ['simulation', 'real-aws-oidc']))
+    )
+
+def render_template_yaml(name: str, template_type: str, description: str, args: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+    """template.yaml as data and text, reusing the dumped spec for identical render keys
+    
+    Top-level block mappings dump key by key, so the per-template header and
+    the shared spec concatenate to exactly dump_yaml of the whole document.
+    """
+    template_yaml = generate_template_yaml(name, template_type, description, args)
+    header = {key: value for key, value in template_yaml.items() if key != "spec"}
+    return template_yaml, dump_yaml(header) + render_spec(render_key(template_type, args))
+
+@lru_cache(maxsize=256)
+def render_spec(key: Tuple[str, Tuple[str, ...], Tuple[str, ...]]) -> str:
+    template_type, cloud_providers, deployment_types = key
+    args = {"cloud_providers": list(cloud_providers), "deployment_types": list(deployment_types)}
+    return dump_yaml({"spec": generate_template_yaml("", template_type, "", args)["spec"]})
+
 async def validate_template(args: Dict[str, Any]) -> List[TextContent]:
     """Validate template against standards"""
+    return await run_blocking(validate_template_sync, args)
+
+def validate_template_sync(args: Dict[str, Any]) -> List[TextContent]:
     template_name = args['template_name']
-    template_path = Path(TEMPLATES_BASE) / template_name
+    template_path = resolve_template_path(template_name)
     
-    if not template_path.exists():
+    if template_path is None:
         return [TextContent(type="text", text=f"❌ Template '{template_name}' not found")]
     
-    issues = []
+    if args.get('fix'):
+        plan = plan_and_apply_fixes(template_path)
+        issues = plan["issues"]
+        fixed = "".join(f"🔧 {fix}\n" for fix in plan["fixes"])
+        if not issues:
+            return [TextContent(type="text", text=f"{fixed}✅ Template '{template_name}' is valid")]
+        return [TextContent(type="text", text=f"{fixed}⚠️ Template '{template_name}' has issues:\n" + "\n".join(f"❌ {issue['message']}" for issue in issues))]
     
-    # Check required files
-    for required_file in TEMPLATE_STANDARDS["required_files"]:
-        file_path = template_path / required_file
-        if not file_path.exists():
-            issues.append(f"❌ Missing required file: {required_file}")
-    
-    # Check template.yaml structure
-    template_yaml_path = template_path / "template.yaml"
-    if template_yaml_path.exists():
-        with open(template_yaml_path) as f:
-            template_data = yaml.safe_load(f)
-            
-        # Check naming convention
-        if not template_data.get('metadata', {}).get('name', '').startswith('billpay-'):
-            issues.append("❌ Template name doesn't follow 'billpay-{purpose}' convention")
-            
-        # Check branch consistency
-        steps = template_data.get('spec', {}).get('steps', [])
-        for step in steps:
-            if step.get('action') == 'github:actions:dispatch':
-                branch = step.get('input', {}).get('branchOrTagName')
-                if branch != 'trunk':
-                    issues.append(f"❌ Step '{step.get('id')}' uses branch '{branch}', should use 'trunk'")
+    issues = check_template(template_path)["issues"]
+    VALIDATION_CACHE.save(VALIDATION_CACHE_SAVE_INTERVAL)
     
     if not issues:
         return [TextContent(type="text", text=f"✅ Template '{template_name}' is valid")]
     else:
-        return [TextContent(type="text", text=f"⚠️ Template '{template_name}' has issues:\n" + "\n".join(issues))]
+        return [TextContent(type="text", text=f"⚠️ Template '{template_name}' has issues:\n" + "\n".join(f"❌ {issue['message']}" for issue in issues))]
+
+async def validate_all_templates(args: Dict[str, Any]) -> List[TextContent]:
+    """Validate every template in the catalog in parallel"""
+    name_pattern = args.get('name_pattern', 'billpay-*')
+    template_type = args.get('template_type')
+    
+    if template_type and template_type not in TEMPLATE_TYPES:
+        return [TextContent(type="text", text=f"❌ Invalid template type. Use: {list(TEMPLATE_TYPES.keys())}")]
+    
+    template_paths = await discover_catalog(name_pattern)
+    results = await check_templates(template_paths)
+    await run_blocking(VALIDATION_CACHE.save)
+    if template_type:
+        results = [result for result in results if result["type"] == template_type]
+    
+    issue_counts: Dict[str, int] = {}
+    for result in results:
+        for issue in result["issues"]:
+            issue_counts[issue["code"]] = issue_counts.get(issue["code"], 0) + 1
+    invalid = [result for result in results if result["issues"]]
+    
+    report = {
+        "total": len(results),
+        "valid": len(results) - len(invalid),
+        "invalid": len(invalid),
+        "issue_counts": issue_counts,
+        "templates": invalid if not args.get('include_valid') else results
+    }
+    return [TextContent(type="text", text=json.dumps(report, separators=(",", ":")))]
+
+async def discover_catalog(name_pattern: str = 'billpay-*') -> List[Path]:
+    """Template directories across every root, scanned concurrently and merged by precedence"""
+    roots = template_roots()
+    per_root = await asyncio.gather(
+        *(run_blocking(discover_templates, root, name_pattern) for root in roots),
+        return_exceptions=True
+    )
+    return sorted(merge_by_precedence(roots, per_root, lambda path: path.name), key=lambda path: path.name)
+
+def discover_templates(base: Path, name_pattern: str = 'billpay-*') -> List[Path]:
+    """Return template directories under base whose name matches the glob"""
+    start = time.perf_counter()
+    with os.scandir(base) as it:
+        names = [
+            entry.name for entry in it
+            if entry.name.startswith('billpay-') and fnmatch.fnmatchcase(entry.name, name_pattern) and entry.is_dir()
+        ]
+    SERVER_STATS.record_phase("scan", time.perf_counter() - start)
+    return [base / name for name in sorted(names)]
+
+async def check_templates(template_paths: List[Path]) -> List[Dict[str, Any]]:
+    """check_template over many templates, parsing the ones not in VALIDATION_CACHE in processes
+    
+    Cache lookups happen here, against the one up-to-date cache: workers only
+    see a copy loaded when they spawned, so they are sent the misses alone.
+    """
+    if not process_batch(len(template_paths)):
+        return await asyncio.gather(*(run_blocking(check_template, path) for path in template_paths))
+    
+    results = await asyncio.gather(*(run_blocking(cached_check, path) for path in template_paths))
+    misses = [index for index, result in enumerate(results) if result is None]
+    checked = await run_blocking(check_templates_in_processes, [template_paths[index] for index in misses])
+    if checked is None:
+        checked = await asyncio.gather(*(run_blocking(check_template, template_paths[index]) for index in misses))
+    for index, result in zip(misses, checked):
+        results[index] = result
+    return results
+
+def cached_check(template_path: Path) -> Optional[Dict[str, Any]]:
+    """check_template's result if VALIDATION_CACHE already holds it, else None"""
+    _, _, cache_key = collect_template(template_path)
+    cached = VALIDATION_CACHE.get(cache_key)
+    return None if cached is None else {"name": template_path.name, **cached}
+
+def check_template(template_path: Path) -> Dict[str, Any]:
+    """Check one template directory against TEMPLATE_STANDARDS, reusing cached results"""
+    cache_key, result, cached, template_data = evaluate_template(template_path)
+    if not cached:
+        if template_data is not None:
+            TEMPLATE_INDEX.update(template_path / "template.yaml", template_data)
+        VALIDATION_CACHE.put(cache_key, result)
+    return {"name": template_path.name, **result}
+
+def check_templates_in_processes(template_paths: List[Path]) -> Optional[List[Dict[str, Any]]]:
+    """check_template over the process pool, folding worker results into the local caches"""
+    checked = map_shards(check_shard, [str(path) for path in template_paths])
+    if checked is None:
+        return None
+    results = []
+    for name, cache_key, result, cached, index_entry in checked:
+        if not cached:
+            if index_entry is not None:
+                TEMPLATE_INDEX.store_summaries([index_entry])
+            VALIDATION_CACHE.put(cache_key, result)
+        results.append({"name": name, **result})
+    return results
+
+def check_shard(template_paths: List[str]) -> List[Tuple[str, str, Dict[str, Any], bool, Optional[Tuple[str, int, int, Dict[str, Any]]]]]:
+    """Process pool worker: (name, cache key, result, cache hit, index entry) per template
+    
+    Only a compact summary of a freshly parsed template.yaml travels back, never the document.
+    """
+    checked = []
+    for path in template_paths:
+        template_path = Path(path)
+        template_yaml_path = template_path / "template.yaml"
+        try:
+            stat = template_yaml_path.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            stat = None
+        # The parent already looked these up in its cache; this process's copy is stale
+        cache_key, result, cached, template_data = evaluate_template(template_path, lookup=False)
+        index_entry = None
+        if template_data is not None and stat is not None:
+            index_entry = (str(template_yaml_path), stat.st_mtime_ns, stat.st_size, summarize_template(template_path, template_data))
+        checked.append((template_path.name, cache_key, result, cached, index_entry))
+    return checked
+
+def collect_template(template_path: Path) -> Tuple[RuleSet, TemplateContext, str]:
+    """List and read a template's watched files and derive its validation cache key"""
+    ruleset = get_ruleset()
+    ctx = ruleset.collect(template_path)
+    
+    digest = hashlib.sha256(standards_fingerprint().encode())
+    digest.update(bytes(relative in ctx.present for relative in ruleset.watched_files))
+    for relative in ruleset.reads:
+        if relative in ctx.contents:
+            digest.update(b"\0" + relative.encode() + b"\0" + ctx.contents[relative].encode())
+        elif relative in ctx.read_errors:
+            digest.update(b"\1" + relative.encode() + b"\0" + ctx.read_errors[relative].encode())
+    return ruleset, ctx, digest.hexdigest()
+
+def evaluate_template(template_path: Path, lookup: bool = True) -> Tuple[str, Dict[str, Any], bool, Optional[Dict[str, Any]]]:
+    """Cache key, check result and whether it was cached, plus the parsed template.yaml on a miss"""
+    ruleset, ctx, cache_key = collect_template(template_path)
+    cached = VALIDATION_CACHE.get(cache_key) if lookup else None
+    if cached is not None:
+        return cache_key, cached, True, None
+    ruleset.evaluate(ctx)
+    template_data = ctx.data if "template.yaml" in ctx.contents else None
+    return cache_key, {"type": ctx.template_type, "issues": ctx.issues}, False, template_data
+
+def parse_shard(entries: List[Tuple[str, int, int]]) -> List[Tuple[str, int, int, Optional[Dict[str, Any]]]]:
+    """Process pool worker: parse template.yaml files into index summaries (None if it vanished)"""
+    parsed = []
+    for path, mtime, size in entries:
+        template_yaml_path = Path(path)
+        template_data = load_template_data(template_yaml_path)
+        parsed.append((path, mtime, size, None if template_data is None else summarize_template(template_yaml_path.parent, template_data)))
+    return parsed
+
+def load_template_data(template_yaml_path: Path) -> Optional[Dict[str, Any]]:
+    """Parse a template.yaml for the catalog index; unreadable, unparsable or non-mapping documents index as empty
+    
+    None means the file is gone, e.g. removed by a git checkout after it was listed.
+    """
+    try:
+        template_data = load_yaml(read_text(template_yaml_path))
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    except (OSError, UnicodeDecodeError, yaml_backend()[0].YAMLError):
+        return {}
+    return template_data if isinstance(template_data, dict) else {}
+
+def as_mapping(value: Any) -> Dict[str, Any]:
+    """A template.yaml section if it is a mapping, else empty (e.g. a bare 'metadata:')"""
+    return value if isinstance(value, dict) else {}
+
+def as_list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else []
+
+def detect_template_type(template_data: Dict[str, Any]) -> Optional[str]:
+    """Infer the TEMPLATE_TYPES key from the workflow a template dispatches"""
+    for step in as_list(as_mapping(template_data.get('spec')).get('steps')):
+        if isinstance(step, dict) and step.get('action') == 'github:actions:dispatch':
+            workflow_id = as_mapping(step.get('input')).get('workflowId')
+            for template_type, config in TEMPLATE_TYPES.items():
+                if config["deployment_target"] == workflow_id:
+                    return template_type
+    return None
 
 async def fix_template_branches(args: Dict[str, Any]) -> List[TextContent]:
     """Fix branch inconsistencies"""
+    return await run_blocking(fix_template_branches_sync, args)
+
+def fix_template_branches_sync(args: Dict[str, Any]) -> List[TextContent]:
     template_name = args['template_name']
-    template_path = Path(TEMPLATES_BASE) / template_name
+    template_path = resolve_template_path(template_name)
     
-    if not template_path.exists():
+    if template_path is None:
         return [TextContent(type="text", text=f"❌ Template '{template_name}' not found")]
     
-    fixes_applied = []
+    plan = plan_and_apply_fixes(template_path, BRANCH_RULE_CODES, dry_run=args.get('dry_run', False))
     
-    # Fix template.yaml
-    template_yaml_path = template_path / "template.yaml"
-    if template_yaml_path.exists():
-        with open(template_yaml_path) as f:
-            template_data = yaml.safe_load(f)
-            
-        steps = template_data.get('spec', {}).get('steps', [])
-        for step in steps:
-            if step.get('action') == 'github:actions:dispatch':
-                old_branch = step.get('input', {}).get('branchOrTagName')
-                if old_branch != 'trunk':
-                    step['input']['branchOrTagName'] = 'trunk'
-                    fixes_applied.append(f"Fixed step '{step.get('id')}': {old_branch} → trunk")
-        
-        with open(template_yaml_path, "w") as f:
-            yaml.dump(template_data, f, default_flow_style=False, sort_keys=False)
-    
-    # Fix workflow files
-    workflow_path = template_path / "skeleton" / ".github" / "workflows" / "deploy.yml"
-    if workflow_path.exists():
-        with open(workflow_path) as f:
-            content = f.read()
-        
-        if "branches: [main]" in content:
-            content = content.replace("branches: [main]", "branches: [main, trunk]")
-            fixes_applied.append("Fixed workflow: Added trunk to trigger branches")
-            
-            with open(workflow_path, "w") as f:
-                f.write(content)
+    if args.get('dry_run'):
+        if not plan["fixes"]:
+            return [TextContent(type="text", text=f"✅ No branch fixes needed for '{template_name}'")]
+        return [TextContent(type="text", text=f"🔍 Planned fixes for '{template_name}':\n" + "\n".join(plan["fixes"]) + "\n\n" + plan_diff(template_path, plan))]
     
-    if fixes_applied:
-        return [TextContent(type="text", text=f"✅ Fixed branches in '{template_name}':\n" + "\n".join(fixes_applied))]
+    if plan["fixes"]:
+        return [TextContent(type="text", text=f"✅ Fixed branches in '{template_name}':\n" + "\n".join(plan["fixes"]))]
     else:
         return [TextContent(type="text", text=f"✅ No branch fixes needed for '{template_name}'")]
 
+async def fix_all_template_branches(args: Dict[str, Any]) -> List[TextContent]:
+    """Fix branch inconsistencies across the catalog in parallel"""
+    name_pattern = args.get('name_pattern', 'billpay-*')
+    template_type = args.get('template_type')
+    dry_run = args.get('dry_run', False)
+    
+    if template_type and template_type not in TEMPLATE_TYPES:
+        return [TextContent(type="text", text=f"❌ Invalid template type. Use: {list(TEMPLATE_TYPES.keys())}")]
+    
+    template_paths = await discover_catalog(name_pattern)
+    # One failing template must not hide what the others already wrote
+    results = await asyncio.gather(*(
+        run_blocking(plan_and_apply_fixes, path, BRANCH_RULE_CODES, template_type, dry_run) for path in template_paths
+    ), return_exceptions=True)
+    
+    plans = []
+    errors = []
+    for path, result in zip(template_paths, results):
+        if isinstance(result, Exception):
+            errors.append({"name": path.name, "error": str(result) or type(result).__name__})
+        elif result["fixes"] and (not template_type or result["type"] == template_type):
+            plans.append(result)
+    
+    report = {
+        "dry_run": dry_run,
+        "scanned": len(template_paths),
+        "changed": len(plans),
+        "failed": len(errors),
+        "files": sum(len(plan["changes"]) for plan in plans),
+        "templates": [],
+        "errors": errors
+    }
+    for plan in plans:
+        template_path = Path(plan["path"])
+        entry = {"name": template_path.name, "fixes": plan["fixes"]}
+        if dry_run:
+            entry["diff"] = plan_diff(template_path, plan)
+        report["templates"].append(entry)
+    return [TextContent(type="text", text=json.dumps(report, separators=(",", ":"), ensure_ascii=False))]
+
+def plan_fixes(template_path: Path, codes: Optional[set] = None) -> Dict[str, Any]:
+    """Run the fixable rules on a template and compute its new file contents without writing"""
+    ctx = get_ruleset().evaluate(get_ruleset().collect(template_path), fix=True, codes=codes)
+    changes = {}
+    
+    if ctx.edits:
+        content = ctx.contents["template.yaml"]
+        new_content = patch_yaml_scalars(content, ctx.root, ctx.edits)
+        if new_content is None:
+            new_content = dump_yaml(ctx.data)
+        if new_content != content:
+            changes[str(template_path / "template.yaml")] = (content, new_content, ctx.data)
+    
+    for relative, new_content in ctx.new_contents.items():
+        if relative != "template.yaml" and new_content != ctx.contents[relative]:
+            changes[str(template_path / relative)] = (ctx.contents[relative], new_content, None)
+    
+    return {"path": str(template_path), "type": ctx.template_type, "fixes": ctx.fixes, "issues": ctx.issues, "changes": changes}
+
+def plan_and_apply_fixes(template_path: Path, codes: Optional[set] = None, template_type: Optional[str] = None, dry_run: bool = False) -> Dict[str, Any]:
+    """Plan a template's fixes and, unless dry_run or of another type, apply them under its write lock"""
+    with TEMPLATE_LOCKS.hold(template_path):
+        plan = plan_fixes(template_path, codes)
+        if not dry_run and (not template_type or plan["type"] == template_type):
+            apply_fixes(plan)
+    return plan
+
+def apply_fixes(plan: Dict[str, Any]):
+    """Write only the files whose content a plan actually changes"""
+    for file_path, (old_content, new_content, template_data) in plan["changes"].items():
+        write_text(Path(file_path), new_content)
+        if template_data is not None:
+            TEMPLATE_INDEX.update(Path(file_path), template_data)
+
+def plan_diff(template_path: Path, plan: Dict[str, Any]) -> str:
+    """Render a plan's pending changes as a unified diff"""
+    import difflib
+    diff = []
+    for file_path, (old_content, new_content, _) in plan["changes"].items():
+        relative = os.path.relpath(file_path, template_path.parent)
+        diff.extend(difflib.unified_diff(
+            old_content.splitlines(keepends=True),
+            new_content.splitlines(keepends=True),
+            fromfile=f"a/{relative}",
+            tofile=f"b/{relative}"
+        ))
+    return "".join(diff)
+
 async def rename_template(args: Dict[str, Any]) -> List[TextContent]:
     """Rename template following conventions"""
+    return await run_blocking(rename_template_sync, args)
+
+def rename_template_sync(args: Dict[str, Any]) -> List[TextContent]:
     old_name = args['old_name']
     new_purpose = args['new_purpose']
     new_name = f"billpay-{new_purpose}"
     
-    old_path = Path(TEMPLATES_BASE) / old_name
-    new_path = Path(TEMPLATES_BASE) / new_name
+    old_path = resolve_template_path(old_name)
+    if old_path is None:
+        return [TextContent(type="text", text=f"❌ Template '{old_name}' not found")]
+    # Renamed in place; a same-named template in any root would shadow or be shadowed
+    new_path = old_path.parent / new_name
+    if resolve_template_path(new_name) is not None:
+        return [TextContent(type="text", text=f"❌ Template '{new_name}' already exists")]
+    
+    dependents = {}
+    if args.get('update_references', True):
+        dependents = find_references(old_name, exclude=old_path)
+        max_files = args.get('max_files', REFERENCE_MAX_UPDATES)
+        if len(dependents) > max_files:
+            return [TextContent(type="text", text=f"❌ '{old_name}' is referenced by {len(dependents)} files (max_files: {max_files}); nothing was renamed")]
     
+    dependent_templates = {owning_template(path) for path in dependents} - {None}
+    with TEMPLATE_LOCKS.hold(old_path, new_path, *dependent_templates):
+        return rename_template_locked(old_name, old_path, new_name, new_path, new_purpose, dependents)
+
+def rename_template_locked(old_name: str, old_path: Path, new_name: str, new_path: Path, new_purpose: str, dependents: Dict[str, List[int]]) -> List[TextContent]:
     if not old_path.exists():
         return [TextContent(type="text", text=f"❌ Template '{old_name}' not found")]
     
@@ -265,52 +2737,413 @@ async def rename_template(args: Dict[str, Any]) -> List[TextContent]:
     
     # Rename directory
     old_path.rename(new_path)
+    TEMPLATE_INDEX.discard(old_path)
+    REFERENCE_INDEX.move(old_path, new_path)
     
     # Update template.yaml metadata
     template_yaml_path = new_path / "template.yaml"
     if template_yaml_path.exists():
-        with open(template_yaml_path) as f:
-            template_data = yaml.safe_load(f)
+        content = read_text(template_yaml_path)
+        template_data, root = compose_yaml(content)
         
+        new_title = f"BillPay {new_purpose.replace('-', ' ').title()}"
         template_data['metadata']['name'] = new_name
-        template_data['metadata']['title'] = f"BillPay {new_purpose.replace('-', ' ').title()}"
+        template_data['metadata']['title'] = new_title
+        
+        new_content = patch_yaml_scalars(content, root, [(("metadata", "name"), new_name), (("metadata", "title"), new_title)])
+        if new_content is None:
+            new_content = dump_yaml(template_data)
+        write_text(template_yaml_path, new_content)
+        TEMPLATE_INDEX.update(template_yaml_path, template_data)
+    
+    updated = update_references(dependents, old_name, new_name)
+    text = f"✅ Template renamed: '{old_name}' → '{new_name}'"
+    if updated:
+        text += f"\n🔗 Updated {sum(updated.values())} references in {len(updated)} files:\n" + "\n".join(f"   {path}" for path in sorted(updated))
+    return [TextContent(type="text", text=text)]
+
+def update_references(dependents: Dict[str, List[int]], old_name: str, new_name: str) -> Dict[str, int]:
+    """Rewrite whole-token occurrences of old_name in the given files; returns replacements per file"""
+    updated = {}
+    for path in dependents:
+        file_path = Path(path)
+        try:
+            content = read_text(file_path)
+        except (OSError, UnicodeDecodeError):
+            continue
+        count = 0
+        
+        def replace(match):
+            nonlocal count
+            if match.group(0) != old_name:
+                return match.group(0)
+            count += 1
+            return new_name
+        
+        new_content = REFERENCE_PATTERN.sub(replace, content)
+        if not count:
+            continue
+        write_text(file_path, new_content)
+        updated[path] = count
         
-        with open(template_yaml_path, "w") as f:
-            yaml.dump(template_data, f, default_flow_style=False, sort_keys=False)
+        template_path = owning_template(path)
+        if template_path is not None and file_path == template_path / "template.yaml":
+            TEMPLATE_INDEX.sync_template(template_path)
+    return updated
+
+async def find_dependents(args: Dict[str, Any]) -> List[TextContent]:
+    """Show the files referencing a template name or workflow ID"""
+    return await run_blocking(find_dependents_sync, args)
+
+def find_dependents_sync(args: Dict[str, Any]) -> List[TextContent]:
+    reference = args['reference']
+    is_workflow = reference.endswith(('.yml', '.yaml'))
+    template_path = None if is_workflow else resolve_template_path(reference)
+    references = find_references(reference, exclude=None if args.get('include_self') else template_path)
     
-    return [TextContent(type="text", text=f"✅ Template renamed: '{old_name}' → '{new_name}'")]
+    report = {
+        "reference": reference,
+        "kind": "workflow" if is_workflow else "template",
+        "total": len(references),
+        "files": [
+            {"path": path, "template": getattr(owning_template(path), "name", None), "lines": lines}
+            for path, lines in references.items()
+        ]
+    }
+    return [TextContent(type="text", text=json.dumps(report, separators=(",", ":"), ensure_ascii=False))]
 
 async def list_templates(args: Dict[str, Any]) -> List[TextContent]:
     """List all templates with status"""
-    templates_path = Path(TEMPLATES_BASE)
-    templates = []
-    
-    for template_dir in templates_path.iterdir():
-        if template_dir.is_dir() and template_dir.name.startswith('billpay-'):
-            template_yaml_path = template_dir / "template.yaml"
-            if template_yaml_path.exists():
-                with open(template_yaml_path) as f:
-                    template_data = yaml.safe_load(f)
-                
-                templates.append({
-                    "name": template_data.get('metadata', {}).get('name', template_dir.name),
-                    "title": template_data.get('metadata', {}).get('title', 'No title'),
-                    "description": template_data.get('metadata', {}).get('description', 'No description'),
-                    "path": str(template_dir),
-                    "steps": len(template_data.get('spec', {}).get('steps', []))
-                })
-    
-    if not templates:
+    templates = await catalog_templates()
+    return await run_blocking(list_templates_sync, args, templates)
+
+def list_templates_sync(args: Dict[str, Any], templates: List[Dict[str, Any]]) -> List[TextContent]:
+    sort = args.get('sort', 'name')
+    if sort not in LIST_SORT_KEYS:
+        return [TextContent(type="text", text=f"❌ Invalid sort. Use: {list(LIST_SORT_KEYS.keys())}")]
+    try:
+        limit = max(1, min(int_argument(args, 'limit', DEFAULT_LIST_LIMIT), MAX_LIST_LIMIT))
+        filters = {**args, 'min_steps': int_argument(args, 'min_steps'), 'max_steps': int_argument(args, 'max_steps')}
+    except ValueError as error:
+        return [TextContent(type="text", text=f"❌ {error}")]
+    
+    after = None
+    if args.get('cursor'):
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(args['cursor'].encode()))
+            if cursor["sort"] != sort:
+                raise ValueError(sort)
+            after = tuple(cursor["after"])
+        except (ValueError, KeyError, TypeError):
+            return [TextContent(type="text", text="❌ Invalid or stale cursor for this sort order")]
+    
+    sort_key, descending = LIST_SORT_KEYS[sort]
+    matched = 0
+    
+    def candidates():
+        nonlocal matched
+        for template in templates:
+            if not template_matches(template, filters):
+                continue
+            matched += 1
+            key = sort_key(template)
+            if after is None or (key < after if descending else key > after):
+                yield template
+    
+    # Select just this page instead of sorting the whole catalog
+    select = heapq.nlargest if descending else heapq.nsmallest
+    try:
+        page = select(limit + 1, candidates(), key=sort_key)
+    except TypeError:
+        # A decodable cursor whose values do not compare with this sort's keys
+        return [TextContent(type="text", text="❌ Invalid or stale cursor for this sort order")]
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        cursor = {"sort": sort, "after": list(sort_key(page[-1]))}
+        next_cursor = base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+    
+    if args.get('format') == 'json':
+        page = [{field: template[field] for field in LIST_FIELDS} for template in page]
+        return [TextContent(type="text", text=json.dumps(
+            {"matched": matched, "count": len(page), "next_cursor": next_cursor, "templates": page},
+            separators=(",", ":"), ensure_ascii=False
+        ))]
+    
+    if not page:
         return [TextContent(type="text", text="No BillPay templates found")]
     
-    result = "📋 BillPay Templates:\n\n"
-    for template in templates:
-        result += f"🎭 **{template['name']}**\n"
-        result += f"   📝 {template['description']}\n"
-        result += f"   🔧 {template['steps']} steps\n"
-        result += f"   📁 {template['path']}\n\n"
+    lines = ["📋 BillPay Templates:", ""]
+    for template in page:
+        lines.append(f"🎭 **{template['name']}**")
+        lines.append(f"   📝 {template['description']}")
+        lines.append(f"   🔧 {template['steps']} steps")
+        lines.append(f"   📁 {template['path']}")
+        lines.append("")
+    if next_cursor:
+        lines.append(f"➡️ Showing {len(page)} of {matched}, next cursor: {next_cursor}")
+        lines.append("")
+    
+    return [TextContent(type="text", text="\n".join(lines) + "\n")]
+
+async def catalog_templates(max_age: float = 0.0) -> List[Dict[str, Any]]:
+    """Index summaries of every visible template, each root refreshed concurrently on its own"""
+    roots = template_roots()
+    per_root = await asyncio.gather(
+        *(run_blocking(current_templates, root, max_age) for root in roots),
+        return_exceptions=True
+    )
+    return merge_by_precedence(roots, per_root, lambda template: os.path.basename(template["path"]))
+
+def current_templates(base: Path, max_age: float = 0.0) -> List[Dict[str, Any]]:
+    """Index summaries for base, from memory when the watcher keeps it hot
+    
+    Without a watcher the directory is rescanned unless the last full scan
+    is younger than max_age seconds.
+    """
+    CATALOG_DB.warm(TEMPLATE_INDEX, base)
+    watcher = CATALOG_WATCHERS.get(base)
+    watched = watcher is not None and watcher.ready
+    if watched or (max_age > 0 and TEMPLATE_INDEX.refreshed_within(base, max_age)):
+        templates = TEMPLATE_INDEX.summaries(base)
+    else:
+        templates = TEMPLATE_INDEX.refresh(base)
+    CATALOG_DB.sync(TEMPLATE_INDEX)
+    return templates
+
+async def export_catalog(args: Dict[str, Any]) -> List[TextContent]:
+    """Write a catalog snapshot, or the delta since an earlier one"""
+    return await run_blocking(export_catalog_sync, args)
+
+def export_catalog_sync(args: Dict[str, Any]) -> List[TextContent]:
+    fmt = args.get('format', 'jsonl')
+    if fmt not in ("jsonl", "msgpack"):
+        return [TextContent(type="text", text="❌ Invalid format. Use: ['jsonl', 'msgpack']")]
+    if fmt == "msgpack" and importlib.util.find_spec("msgpack") is None:
+        return [TextContent(type="text", text="❌ msgpack format requires the msgpack package (pip install msgpack)")]
     
-    return [TextContent(type="text", text=result)]
+    since = args.get('since')
+    if since == "latest":
+        since = CATALOG_EXPORTER.latest()
+    output = Path(args['output']) if args.get('output') else None
+    try:
+        summary = CATALOG_EXPORTER.export(template_roots(), fmt, since, output)
+    except KeyError:
+        return [TextContent(type="text", text=f"❌ Unknown snapshot '{args.get('since')}'; export without 'since' for a full snapshot")]
+    return [TextContent(type="text", text=json.dumps(summary, separators=(",", ":")))]
+
+async def search_templates(args: Dict[str, Any]) -> List[TextContent]:
+    """Search the SQLite template catalog"""
+    visible = await catalog_templates(SEARCH_MAX_STALENESS)
+    return await run_blocking(search_templates_sync, args, {template["path"] for template in visible})
+
+def search_templates_sync(args: Dict[str, Any], visible: set) -> List[TextContent]:
+    filters, terms = parse_search_query(args.get('query', ''))
+    for key in ("workflow_id", "branch", "action", "tag", "parameter", "template_type"):
+        if args.get(key):
+            filters[key] = args[key]
+    try:
+        limit = max(1, min(int_argument(args, 'limit', 20), MAX_LIST_LIMIT))
+    except ValueError as error:
+        return [TextContent(type="text", text=f"❌ {error}")]
+    
+    roots = template_roots()
+    results = CATALOG_DB.search(roots, filters, terms, limit, visible)
+    if results is None:
+        return [TextContent(type="text", text=f"❌ Template search needs the catalog database {CATALOG_DB.path} ({CATALOG_DB.error})")]
+    return [TextContent(type="text", text=json.dumps(
+        {"filters": filters, "terms": terms, "count": len(results), "templates": results},
+        separators=(",", ":"), ensure_ascii=False
+    ))]
+
+def parse_search_query(query: str) -> Tuple[Dict[str, Any], List[str]]:
+    """Split a free-text query into structured filters and full-text terms
+    
+    Workflow files ("deploy-complete.yml"), "branch <name>" and the verb
+    "dispatch" become exact filters; the remaining words are ranked with FTS.
+    """
+    filters: Dict[str, Any] = {}
+    
+    workflows = re.findall(r"[\w.-]+\.ya?ml\b", query)
+    if workflows:
+        filters["workflow_id"] = workflows[0]
+        query = query.replace(workflows[0], " ")
+    
+    branch = re.search(r"\bbranch\s+([\w./-]+)", query, re.IGNORECASE)
+    if branch:
+        filters["branch"] = branch.group(1)
+        query = query[:branch.start()] + " " + query[branch.end():]
+    
+    if re.search(r"\bdispatch\w*", query, re.IGNORECASE):
+        filters["action"] = "github:actions:dispatch"
+        query = re.sub(r"\bdispatch\w*", " ", query, flags=re.IGNORECASE)
+    
+    terms = [word for word in re.findall(r"[\w:.-]+", query.lower()) if word not in SEARCH_STOPWORDS]
+    return filters, terms
+
+def int_argument(args: Dict[str, Any], key: str, default: Optional[int] = None) -> Optional[int]:
+    """An integer tool argument, or default when absent; ValueError names the argument"""
+    value = args.get(key)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{key}' must be an integer, got {value!r}") from None
+
+def template_matches(template: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """Apply list_templates filters to an index summary
+    
+    metadata.name may be any YAML scalar, so it is compared as a string like the sort keys do.
+    """
+    if filters.get('name_prefix') and not str(template["name"]).startswith(str(filters['name_prefix'])):
+        return False
+    if filters.get('tag') and str(filters['tag']) not in template["tags"]:
+        return False
+    if filters.get('template_type') and template["type"] != filters['template_type']:
+        return False
+    if filters.get('min_steps') is not None and template["steps"] < filters['min_steps']:
+        return False
+    if filters.get('max_steps') is not None and template["steps"] > filters['max_steps']:
+        return False
+    return True
+
+@lru_cache(maxsize=None)
+def yaml_backend() -> Tuple[Any, Any, Any, Any]:
+    """The yaml module with its (loader, dumper, safe dumper), imported on first use
+    
+    libyaml C bindings when PyYAML was built with them, pure Python otherwise.
+    """
+    import yaml
+    return (
+        yaml,
+        getattr(yaml, "CSafeLoader", yaml.SafeLoader),
+        getattr(yaml, "CDumper", yaml.Dumper),
+        getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    )
+
+def load_yaml(content: str) -> Any:
+    """Parse a YAML document with the fastest available safe loader"""
+    yaml, loader, _, _ = yaml_backend()
+    start = time.perf_counter()
+    data = yaml.load(content, Loader=loader)
+    SERVER_STATS.record_phase("yaml_parse", time.perf_counter() - start)
+    return data
+
+def dump_yaml(data: Any, sort_keys: bool = False) -> str:
+    """Serialize data in block style with the fastest available dumper"""
+    yaml, _, dumper, _ = yaml_backend()
+    start = time.perf_counter()
+    content = yaml.dump(data, Dumper=dumper, default_flow_style=False, sort_keys=sort_keys, width=YAML_WIDTH)
+    SERVER_STATS.record_phase("yaml_dump", time.perf_counter() - start)
+    return content
+
+def compose_yaml(content: str) -> Tuple[Any, Optional["yaml.Node"]]:
+    """Parse a YAML document once, returning both the data and its node tree"""
+    _, loader_class, _, _ = yaml_backend()
+    start = time.perf_counter()
+    loader = loader_class(content)
+    try:
+        root = loader.get_single_node()
+        data = loader.construct_document(root) if root is not None else None
+    finally:
+        loader.dispose()
+    SERVER_STATS.record_phase("yaml_parse", time.perf_counter() - start)
+    return data, root
+
+def patch_yaml_scalars(content: str, root: Optional["yaml.Node"], edits: List[Tuple[Tuple[Any, ...], Any]]) -> Optional[str]:
+    """Rewrite scalar values in place using their source marks
+    
+    Only the byte ranges of the targeted scalars change, so comments, ordering
+    and formatting elsewhere survive. Returns None when an edit cannot be done
+    in place (missing key, non-scalar or block-style target) and the caller
+    should fall back to a full dump.
+    """
+    yaml, _, _, safe_dumper = yaml_backend()
+    replacements = []
+    for path, value in edits:
+        node = root
+        for key in path:
+            if isinstance(node, yaml.MappingNode) and isinstance(key, str):
+                node = next((value_node for key_node, value_node in node.value
+                             if isinstance(key_node, yaml.ScalarNode) and key_node.value == key), None)
+            elif isinstance(node, yaml.SequenceNode) and isinstance(key, int) and key < len(node.value):
+                node = node.value[key]
+            else:
+                node = None
+            if node is None:
+                return None
+        if not isinstance(node, yaml.ScalarNode):
+            return None
+        # libyaml reports plain scalars with an empty style, PyYAML with None
+        style = node.style or None
+        if style not in (None, "'", '"'):
+            return None
+        
+        if style is None and isinstance(value, str) and any(char in value for char in ",[]{}"):
+            # Plain scalars may sit inside a flow collection; quote flow indicators
+            style = "'"
+        rendered = yaml.dump(value, Dumper=safe_dumper, default_style=style, width=YAML_WIDTH, allow_unicode=True)
+        rendered = rendered[:-len("\n...\n")] if rendered.endswith("\n...\n") else rendered.rstrip("\n")
+        if "\n" in rendered:
+            return None
+        replacements.append((node.start_mark.index, node.end_mark.index, rendered))
+    
+    replacements.sort()
+    for (_, end, _), (start, _, _) in zip(replacements, replacements[1:]):
+        if start < end:
+            return None
+    for start, end, rendered in reversed(replacements):
+        content = content[:start] + rendered + content[end:]
+    return content
+
+async def server_stats(args: Dict[str, Any]) -> List[TextContent]:
+    """Report instrumentation counters collected since start or the last reset"""
+    stats = SERVER_STATS.snapshot()
+    stats["scheduler"] = SCHEDULER.snapshot()
+    stats["profiler"] = TOOL_PROFILER.snapshot()
+    if CATALOG_WATCHERS:
+        stats["watchers"] = {str(root): {"mode": watcher.mode, "ready": watcher.ready} for root, watcher in CATALOG_WATCHERS.items()}
+    if CATALOG_DB.error is not None:
+        stats["catalog_db_error"] = CATALOG_DB.error
+    if args.get('reset'):
+        SERVER_STATS.reset()
+    return [TextContent(type="text", text=json.dumps(stats, separators=(",", ":")))]
+
+def summarize_template(template_dir: Path, template_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the metadata list_templates needs from a parsed template.yaml"""
+    metadata = as_mapping(template_data.get('metadata'))
+    spec = as_mapping(template_data.get('spec'))
+    
+    parameters = []
+    for section in as_list(spec.get('parameters')):
+        if isinstance(section, dict):
+            parameters.extend(str(name) for name in as_mapping(section.get('properties')))
+    
+    step_details = []
+    for step in as_list(spec.get('steps')):
+        if not isinstance(step, dict):
+            continue
+        step_input = as_mapping(step.get('input'))
+        step_details.append({
+            "id": step.get('id'),
+            "action": step.get('action'),
+            "workflow": step_input.get('workflowId'),
+            "branch": step_input.get('branchOrTagName'),
+            "repo": step_input.get('repoUrl')
+        })
+    
+    return {
+        "name": metadata.get('name', template_dir.name),
+        "title": metadata.get('title', 'No title'),
+        "description": metadata.get('description', 'No description'),
+        "path": str(template_dir),
+        "steps": len(as_list(spec.get('steps'))),
+        "tags": [str(tag) for tag in as_list(metadata.get('tags'))],
+        "type": detect_template_type(template_data),
+        "parameters": parameters,
+        "step_details": step_details
+    }
 
 def generate_template_yaml(name: str, template_type: str, description: str, args: Dict[str, Any]) -> Dict[str, Any]:
     """Generate template.yaml structure"""
@@ -447,8 +3280,16 @@ def generate_output(config: Dict[str, Any]) -> Dict[str, Any]:
     
     return {"links": links}
 
-def generate_skeleton_files(skeleton_path: Path, template_name: str, config: Dict[str, Any], args: Dict[str, Any]):
+def generate_skeleton_files(skeleton_path: Path, template_name: str, template_type: str, args: Dict[str, Any]):
     """Generate skeleton files"""
+    for relative, content in render_skeleton(render_key(template_type, args)):
+        write_text(skeleton_path / relative, content)
+
+@lru_cache(maxsize=256)
+def render_skeleton(key: Tuple[str, Tuple[str, ...], Tuple[str, ...]]) -> Tuple[Tuple[str, str], ...]:
+    """Rendered skeleton files as (relative path, content), once per render key"""
+    config = TEMPLATE_TYPES[key[0]]
+    
     # catalog-info.yaml
     catalog_info = {
         "apiVersion": "backstage.io/v1alpha1",
@@ -469,8 +3310,7 @@ def generate_skeleton_files(skeleton_path: Path, template_name: str, config: Dic
         }
     }
     
-    with open(skeleton_path / "catalog-info.yaml", "w") as f:
-        yaml.dump(catalog_info, f, default_flow_style=False)
+    catalog_info_content = dump_yaml(catalog_info, sort_keys=True)
     
     # README.md
     readme_content = f"""# ${{{{ values.name }}}}
@@ -489,9 +3329,6 @@ BillPay Project: **${{{{ values.name }}}}**
 This project follows BillPay's enterprise architecture with {config['purpose']}.
 """
     
-    with open(skeleton_path / "README.md", "w") as f:
-        f.write(readme_content)
-    
     # deploy.yml workflow
     workflow_content = f"""name: Deploy
 on:
@@ -529,15 +3366,23 @@ jobs:
           echo "🔗 Monitor at: https://github.com/giovanemere/ia-ops-iac/actions"
 """
     
-    with open(skeleton_path / ".github" / "workflows" / "deploy.yml", "w") as f:
-        f.write(workflow_content)
+    return (
+        ("catalog-info.yaml", catalog_info_content),
+        ("README.md", readme_content),
+        (".github/workflows/deploy.yml", workflow_content)
+    )
 
 if __name__ == "__main__":
-    import asyncio
     from mcp.server.stdio import stdio_server
     
     async def main():
-        async with stdio_server() as (read_stream, write_stream):
-            await app.run(read_stream, write_stream, app.create_initialization_options())
+        # Warming the index must not delay the handshake
+        threading.Thread(target=start_catalog_watchers, name="catalog-watcher-start", daemon=True).start()
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await app.run(read_stream, write_stream, app.create_initialization_options())
+        finally:
+            # Single validations save at most every VALIDATION_CACHE_SAVE_INTERVAL seconds
+            VALIDATION_CACHE.save()
     
     asyncio.run(main())
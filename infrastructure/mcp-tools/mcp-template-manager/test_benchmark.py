@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Startup budget: a fresh server must answer initialize over stdio within STARTUP_BUDGET_MS
+"""
+
+import argparse
+
+import pytest
+
+# The server process needs the real mcp stdio transport, not the stub test_server.py installs
+pytest.importorskip("mcp.server.stdio")
+
+import benchmark
+
+# Median time (ms) from launching server.py to its initialize response. About
+# 600ms of it is importing the mcp package itself; the budget leaves headroom
+# for slow CI hosts while still catching an eager heavy import.
+STARTUP_BUDGET_MS = 1500
+
+def test_startup_within_budget():
+    results = benchmark.bench_startup(argparse.Namespace(runs=5, budget=STARTUP_BUDGET_MS, server=str(benchmark.SERVER_PATH)))
+
+    assert results["tools"] == len(benchmark.server.build_tools())
+    assert results["within_budget"], f"median first response {results['first_response']['p50_ms']}ms > {STARTUP_BUDGET_MS}ms"
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Tests for the template manager MCP server (python -m pytest)
+"""
+
+import asyncio
+import json
+import shutil
+import sys
+import time
+import types
+from dataclasses import dataclass
+from typing import Any, Dict
+
+try:
+    import mcp.server  # noqa: F401
+except ImportError:
+    # Just enough of the mcp package to import server and call its handlers directly
+    @dataclass
+    class Tool:
+        name: str
+        description: str
+        inputSchema: Dict[str, Any]
+
+    @dataclass
+    class TextContent:
+        type: str
+        text: str
+
+    class Server:
+        def __init__(self, name: str):
+            self.name = name
+
+        def list_tools(self):
+            return lambda func: func
+
+        def call_tool(self):
+            return lambda func: func
+
+    mcp_module = types.ModuleType("mcp")
+    mcp_server = types.ModuleType("mcp.server")
+    mcp_types = types.ModuleType("mcp.types")
+    mcp_server.Server = Server
+    mcp_types.Tool = Tool
+    mcp_types.TextContent = TextContent
+    mcp_module.server = mcp_server
+    mcp_module.types = mcp_types
+    sys.modules.update({"mcp": mcp_module, "mcp.server": mcp_server, "mcp.types": mcp_types})
+
+import pytest
+
+import server
+
+# Per-template parse delays (s) for the concurrency test; fewer than the
+# default worker count (CPUs + 4) so they can all run at once
+PARSE_DELAYS = [0.2, 0.3, 0.4, 0.5]
+
+@pytest.fixture
+def templates_base(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "TEMPLATES_BASE", str(tmp_path))
+    monkeypatch.setattr(server, "TEMPLATE_ROOTS", [])
+    return tmp_path
+
+def test_concurrent_validations_take_the_slowest_not_the_sum(templates_base, monkeypatch):
+    assert server.MAX_WORKERS >= len(PARSE_DELAYS)
+    names = [f"concurrency-{index}" for index in range(len(PARSE_DELAYS))]
+
+    async def create():
+        for name in names:
+            await server.call_tool("create_template", {"template_name": name, "template_type": "simple-deployment", "description": name})
+    asyncio.run(create())
+
+    load_yaml = server.load_yaml
+
+    def slow_load_yaml(content: str) -> Any:
+        delay = next(delay for name, delay in zip(names, PARSE_DELAYS) if f"name: billpay-{name}\n" in content)
+        time.sleep(delay)
+        return load_yaml(content)
+
+    monkeypatch.setattr(server, "load_yaml", slow_load_yaml)
+    # Every call must parse, not hit a result cached by an earlier run
+    monkeypatch.setattr(server.VALIDATION_CACHE, "get", lambda key: None)
+
+    async def validate_all():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            server.call_tool("validate_template", {"template_name": f"billpay-{name}"}) for name in names
+        ))
+        return time.perf_counter() - start, results
+    elapsed, results = asyncio.run(validate_all())
+
+    assert all("is valid" in result[0].text for result in results)
+    slowest, total = max(PARSE_DELAYS), sum(PARSE_DELAYS)
+    assert slowest <= elapsed < slowest + (total - slowest) / 2
+
+@pytest.fixture
+def docs_root(tmp_path, templates_base, monkeypatch):
+    docs = tmp_path.parent / f"{tmp_path.name}-docs"
+    docs.mkdir()
+    monkeypatch.setattr(server, "REFERENCE_ROOTS", [str(docs)])
+    monkeypatch.setattr(server, "REFERENCE_INDEX", server.ReferenceIndex())
+    return docs
+
+def test_rename_updates_template_names_in_reference_roots_only(templates_base, docs_root):
+    asyncio.run(server.call_tool("create_template", {"template_name": "foo", "template_type": "simple-deployment", "description": "foo"}))
+    guide = docs_root / "guide.md"
+    guide.write_text(
+        "Deploy with billpay-foo.\n"
+        "The workflow billpay-foo.yml and billpay-foo.yaml build it.\n"
+        "billpay-foo-v2 is a different template.\n"
+    )
+
+    result = asyncio.run(server.call_tool("rename_template", {"old_name": "billpay-foo", "new_purpose": "baz"}))
+
+    assert "billpay-baz" in result[0].text
+    assert (templates_base / "billpay-baz" / "template.yaml").exists()
+    assert guide.read_text() == (
+        "Deploy with billpay-baz.\n"
+        "The workflow billpay-foo.yml and billpay-foo.yaml build it.\n"
+        "billpay-foo-v2 is a different template.\n"
+    )
+
+def test_find_dependents_finds_workflow_ids_named_like_templates(templates_base, docs_root):
+    (docs_root / "ci.md").write_text("Runs billpay-foo.yml\nthen billpay-foo\n")
+
+    workflow = json.loads(asyncio.run(server.call_tool("find_dependents", {"reference": "billpay-foo.yml"}))[0].text)
+    template = json.loads(asyncio.run(server.call_tool("find_dependents", {"reference": "billpay-foo"}))[0].text)
+
+    assert [(entry["path"], entry["lines"]) for entry in workflow["files"]] == [(str(docs_root / "ci.md"), [1])]
+    assert [(entry["path"], entry["lines"]) for entry in template["files"]] == [(str(docs_root / "ci.md"), [2])]
+
+def test_validate_all_reports_unreadable_templates_per_template(templates_base):
+    async def create():
+        for name in ("good", "latin1"):
+            await server.call_tool("create_template", {"template_name": name, "template_type": "simple-deployment", "description": name})
+    asyncio.run(create())
+    (templates_base / "billpay-latin1" / "template.yaml").write_bytes(b"metadata:\n  title: Caf\xe9\n")
+
+    report = json.loads(asyncio.run(server.call_tool("validate_all_templates", {"include_valid": True}))[0].text)
+
+    by_name = {template["name"]: template for template in report["templates"]}
+    assert report["total"] == 2
+    assert by_name["billpay-good"]["issues"] == []
+    assert [issue["code"] for issue in by_name["billpay-latin1"]["issues"]][:1] == ["read_error"]
+
+def test_list_templates_indexes_unreadable_template_yaml_as_empty(templates_base):
+    asyncio.run(server.call_tool("create_template", {"template_name": "good", "template_type": "simple-deployment", "description": "good"}))
+    (templates_base / "billpay-latin1").mkdir()
+    (templates_base / "billpay-latin1" / "template.yaml").write_bytes(b"\xe9")
+
+    listing = json.loads(asyncio.run(server.call_tool("list_templates", {"format": "json"}))[0].text)
+
+    assert sorted(template["name"] for template in listing["templates"]) == ["billpay-good", "billpay-latin1"]
+
+def test_list_templates_works_without_a_usable_catalog_database(templates_base, tmp_path, monkeypatch):
+    blocker = tmp_path.parent / f"{tmp_path.name}-not-a-dir"
+    blocker.write_text("")
+    monkeypatch.setattr(server, "CATALOG_DB", server.CatalogDB(blocker / "catalog.sqlite"))
+    monkeypatch.setattr(server, "TEMPLATE_INDEX", server.TemplateIndex())
+    asyncio.run(server.call_tool("create_template", {"template_name": "good", "template_type": "simple-deployment", "description": "good"}))
+
+    listing = json.loads(asyncio.run(server.call_tool("list_templates", {"format": "json"}))[0].text)
+    search = asyncio.run(server.call_tool("search_templates", {"query": "good"}))[0].text
+
+    assert [template["name"] for template in listing["templates"]] == ["billpay-good"]
+    assert search.startswith("❌") and server.CATALOG_DB.error
+
+def test_validate_template_with_an_unwritable_cache_dir(templates_base, tmp_path, monkeypatch):
+    blocker = tmp_path.parent / f"{tmp_path.name}-not-a-dir"
+    blocker.write_text("")
+    monkeypatch.setattr(server, "VALIDATION_CACHE", server.ValidationCache(blocker / "validation-cache.json", 10))
+    asyncio.run(server.call_tool("create_template", {"template_name": "good", "template_type": "simple-deployment", "description": "good"}))
+
+    result = asyncio.run(server.call_tool("validate_template", {"template_name": "billpay-good"}))
+
+    assert "is valid" in result[0].text
+
+def test_patch_yaml_scalars_changes_only_the_target_scalars():
+    content = (
+        "# Plantilla de depuración — no tocar\r\n"
+        "metadata:\r\n"
+        "  title: \"Pagos en línea ☕\"  # título visible\r\n"
+        "  name: billpay-old\r\n"
+        "spec:\r\n"
+        "  steps:\r\n"
+        "    - id: dispatch  # paso único\r\n"
+        "      input: {workflowId: deploy.yml, branchOrTagName: main}\r\n"
+    )
+    data, root = server.compose_yaml(content)
+
+    patched = server.patch_yaml_scalars(content, root, [
+        (("metadata", "name"), "billpay-new"),
+        (("spec", "steps", 0, "input", "branchOrTagName"), "trunk"),
+    ])
+
+    assert patched == (content
+                       .replace("name: billpay-old", "name: billpay-new")
+                       .replace("branchOrTagName: main", "branchOrTagName: trunk"))
+
+def test_fix_template_branches_keeps_crlf_line_endings(templates_base):
+    asyncio.run(server.call_tool("create_template", {"template_name": "crlf", "template_type": "simple-deployment", "description": "crlf"}))
+    template_yaml_path = templates_base / "billpay-crlf" / "template.yaml"
+    original = template_yaml_path.read_bytes().replace(b"branchOrTagName: trunk", b"branchOrTagName: main").replace(b"\n", b"\r\n")
+    template_yaml_path.write_bytes(original)
+
+    result = asyncio.run(server.call_tool("fix_template_branches", {"template_name": "billpay-crlf"}))
+
+    assert "main → trunk" in result[0].text
+    fixed = template_yaml_path.read_bytes()
+    assert fixed.count(b"\r\n") == original.count(b"\r\n") and b"\n" not in fixed.replace(b"\r\n", b"")
+    changed = [(old.strip(), new.strip()) for old, new in zip(original.split(b"\r\n"), fixed.split(b"\r\n")) if old != new]
+    assert changed == [(b"branchOrTagName: main", b"branchOrTagName: trunk")]
+
+def write_template_yaml(base, directory: str, name: Any, steps: int):
+    (base / directory).mkdir()
+    step_lines = "".join(f"    - id: step{index}\n      action: debug:log\n" for index in range(steps))
+    (base / directory / "template.yaml").write_text(f"metadata:\n  name: {name}\nspec:\n  steps:\n{step_lines or '    []'}\n")
+
+@pytest.mark.parametrize("sort", sorted(server.LIST_SORT_KEYS))
+def test_list_templates_pages_yield_every_template_once(templates_base, sort):
+    # Ties on steps and on name, plus a metadata.name YAML reads as an int
+    layout = [("billpay-a", "billpay-a", 2), ("billpay-b", "billpay-b", 1), ("billpay-c", "billpay-c", 2),
+              ("billpay-d", "billpay-a", 3), ("billpay-e", 42, 1), ("billpay-f", "billpay-f", 0), ("billpay-g", "billpay-g", 2)]
+    for directory, name, steps in layout:
+        write_template_yaml(templates_base, directory, name, steps)
+
+    seen, cursor = [], None
+    while True:
+        args = {"format": "json", "sort": sort, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = json.loads(asyncio.run(server.call_tool("list_templates", args))[0].text)
+        assert page["matched"] == len(layout)
+        seen.extend(page["templates"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    sort_key, descending = server.LIST_SORT_KEYS[sort]
+    assert sorted(template["path"] for template in seen) == sorted(str(templates_base / directory) for directory, _, _ in layout)
+    assert [template["path"] for template in seen] == [template["path"] for template in sorted(seen, key=sort_key, reverse=descending)]
+
+def test_list_templates_rejects_bad_arguments(templates_base):
+    write_template_yaml(templates_base, "billpay-a", 42, 1)
+
+    bad_limit = asyncio.run(server.call_tool("list_templates", {"limit": "ten"}))[0].text
+    prefixed = json.loads(asyncio.run(server.call_tool("list_templates", {"format": "json", "name_prefix": "4"}))[0].text)
+
+    assert bad_limit.startswith("❌") and "'limit'" in bad_limit
+    assert [template["name"] for template in prefixed["templates"]] == [42]
+
+def test_export_catalog_delta_reports_added_changed_and_removed(templates_base, tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "CATALOG_EXPORTER", server.CatalogExporter(tmp_path.parent / f"{tmp_path.name}-snapshots"))
+    for name in ("keep", "edit", "drop"):
+        write_template_yaml(templates_base, f"billpay-{name}", f"billpay-{name}", 1)
+
+    full = json.loads(asyncio.run(server.call_tool("export_catalog", {}))[0].text)
+    write_template_yaml(templates_base, "billpay-new", "billpay-new", 1)
+    (templates_base / "billpay-edit" / "template.yaml").write_text("metadata:\n  name: billpay-edit\n  title: Edited\n")
+    shutil.rmtree(templates_base / "billpay-drop")
+    delta = json.loads(asyncio.run(server.call_tool("export_catalog", {"since": full["snapshot_id"]}))[0].text)
+
+    assert (full["kind"], full["templates"]) == ("full", 3)
+    assert (delta["kind"], delta["added"], delta["changed"], delta["removed"]) == ("delta", 1, 1, 1)
+    with open(delta["path"]) as f:
+        header, *ops = [json.loads(line) for line in f]
+    assert header["since"] == full["snapshot_id"]
+    assert [(op["op"], op["name"]) for op in ops] == [("removed", "billpay-drop"), ("changed", "billpay-edit"), ("added", "billpay-new")]
+
+    unchanged = json.loads(asyncio.run(server.call_tool("export_catalog", {"since": "latest"}))[0].text)
+    assert (unchanged["snapshot_id"], unchanged["added"], unchanged["changed"], unchanged["removed"]) == (delta["snapshot_id"], 0, 0, 0)